@@ -0,0 +1,343 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from visual_uv.visualuv_mesh import MeshArrays
+from visual_uv.visualuv_analysis import (
+    stretching,
+    signed_uv_areas,
+    flipped_polygons,
+    UVIslands,
+    uv_overlaps,
+)
+from visual_uv.visualuv_overlay import OverlayData, OverlaySettings
+
+MESH_TYPES = ('grid', 'sphere', 'atlas')
+TRIANGLE_COUNTS = (1000, 10000, 100000, 1000000, 5000000)
+STRETCH_TYPES = ('ANGLES', 'AREA', 'EDGE_LENGTH')
+REPEATS = 3
+# a stage slower than its baseline by more than this fraction is a regression
+REGRESSION_THRESHOLD = 0.1
+# stages faster than this are dominated by timer noise and never flagged
+NOISE_SECONDS = 0.001
+
+THEME_COLORS = {
+    'vertex_select': np.array((1.0, 0.5, 0.0, 1.0), dtype=np.float32),
+    'vertex': np.array((0.0, 0.0, 0.0, 1.0), dtype=np.float32),
+    'face_select': np.array((1.0, 0.5, 0.0, 0.2), dtype=np.float32),
+    'edge_seam': np.array((0.9, 0.1, 0.1, 1.0), dtype=np.float32),
+    'edge_select': np.array((1.0, 0.6, 0.0, 1.0), dtype=np.float32),
+    'edge': np.array((0.0, 0.0, 0.0, 1.0), dtype=np.float32),
+}
+
+
+class SyntheticCollection():
+
+    # stands in for a bpy collection, foreach_get copies the generated data like Blender does
+    def __init__(self, length, **attributes):
+        self.length = length
+        self.attributes = attributes
+
+    def __len__(self):
+        return self.length
+
+    def foreach_get(self, attribute, array):
+        array[:] = self.attributes[attribute].ravel()
+
+
+class SyntheticMesh():
+
+    # a UV mapped mesh of quads and triangles, the quads are split into two loop triangles each
+    def __init__(self, vertex_co, polygons, polygon_uvs):
+        vertex_co = np.asarray(vertex_co, dtype=np.float32)
+        loop_vertices = np.concatenate([group.ravel() for group in polygons]).astype(np.int32)
+        loop_uvs = np.concatenate([uvs.reshape(-1, 2) for uvs in polygon_uvs]).astype(np.float32)
+        loop_total = np.concatenate([np.full(len(group), group.shape[1]) for group in polygons]).astype(np.int32)
+        loop_start = (np.cumsum(loop_total) - loop_total).astype(np.int32)
+        polygon_count = len(loop_total)
+
+        # fan triangulation of every polygon
+        tri_loops = []
+        tri_polygons = []
+        first_polygon = 0
+        for group in polygons:
+            sides = group.shape[1]
+            starts = loop_start[first_polygon:first_polygon + len(group)]
+            for corner in range(1, sides - 1):
+                tri_loops.append(starts[:, np.newaxis] + np.array((0, corner, corner + 1)))
+                tri_polygons.append(np.arange(first_polygon, first_polygon + len(group)))
+            first_polygon += len(group)
+        tri_loops = np.concatenate(tri_loops).astype(np.int32)
+        tri_polygons = np.concatenate(tri_polygons).astype(np.int32)
+        # loop triangles are ordered by polygon
+        order = np.argsort(tri_polygons, kind='stable')
+        tri_loops = tri_loops[order]
+        tri_polygons = tri_polygons[order]
+
+        # every polygon side is an edge, shared by the polygons on both of its sides
+        following = np.arange(len(loop_vertices)) + 1
+        ends = loop_start + loop_total
+        following[ends - 1] = loop_start
+        sides = np.sort(np.column_stack((loop_vertices, loop_vertices[following])), axis=1)
+        edge_vertices, loop_edges = np.unique(sides, axis=0, return_inverse=True)
+
+        loop_polygons = np.repeat(np.arange(polygon_count), loop_total)
+        centers = np.zeros((polygon_count, 3), dtype=np.float32)
+        for axis in range(3):
+            centers[:, axis] = np.bincount(loop_polygons, weights=vertex_co[loop_vertices, axis]) / loop_total
+
+        self.triangle_count = len(tri_loops)
+        self.vertices = SyntheticCollection(
+            len(vertex_co),
+            co=vertex_co,
+            normal=vertex_co / np.maximum(np.linalg.norm(vertex_co, axis=1, keepdims=True), 1e-6),
+            select=np.zeros(len(vertex_co), dtype=bool),
+        )
+        self.edges = SyntheticCollection(
+            len(edge_vertices),
+            vertices=edge_vertices.astype(np.int32),
+            select=np.zeros(len(edge_vertices), dtype=bool),
+            use_seam=np.zeros(len(edge_vertices), dtype=bool),
+        )
+        self.loops = SyntheticCollection(
+            len(loop_vertices),
+            vertex_index=loop_vertices,
+            edge_index=loop_edges.ravel().astype(np.int32),
+        )
+        self.polygons = SyntheticCollection(
+            polygon_count,
+            loop_start=loop_start,
+            loop_total=loop_total,
+            center=centers,
+            hide=np.zeros(polygon_count, dtype=bool),
+            select=np.zeros(polygon_count, dtype=bool),
+        )
+        self.loop_triangles = SyntheticCollection(
+            len(tri_loops),
+            vertices=loop_vertices[tri_loops],
+            loops=tri_loops,
+            polygon_index=tri_polygons,
+        )
+        self.uv_layers = type('UVLayers', (), {'active': type('UVLayer', (), {'name': 'UVMap'})})
+        self.attributes = {'UVMap': type('Attribute', (), {'data': SyntheticCollection(len(loop_uvs), vector=loop_uvs)})}
+
+    def calc_loop_triangles(self):
+        pass
+
+
+def grid_polygons(columns, rows):
+    # quads of a regular grid, counter-clockwise in the UV map
+    i, j = np.meshgrid(np.arange(columns), np.arange(rows), indexing='ij')
+    first = (i * (rows + 1) + j).ravel()
+    return np.column_stack((first, first + rows + 1, first + rows + 2, first + 1))
+
+
+def grid_mesh(triangle_count):
+    size = max(int(np.sqrt(triangle_count / 2.0)), 1)
+    u, v = np.meshgrid(np.linspace(0.0, 1.0, size + 1), np.linspace(0.0, 1.0, size + 1), indexing='ij')
+    coords = np.column_stack((u.ravel(), v.ravel(), np.zeros(u.size)))
+    quads = grid_polygons(size, size)
+    uvs = coords[quads][:, :, :2]
+    return SyntheticMesh(coords, [quads], [uvs])
+
+
+def sphere_mesh(triangle_count):
+    # UV sphere with a seam along one meridian, quads between the rings and triangle fans at the poles
+    segments = max(int(np.sqrt(triangle_count)), 3)
+    rings = max(triangle_count // (2 * segments), 2)
+    theta = np.linspace(0.0, np.pi, rings + 1)[1:-1]
+    phi = np.linspace(0.0, 2.0 * np.pi, segments, endpoint=False)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    ring_coords = np.column_stack((np.sin(t).ravel() * np.cos(p).ravel(), np.sin(t).ravel() * np.sin(p).ravel(), np.cos(t).ravel()))
+    coords = np.concatenate((ring_coords, [(0.0, 0.0, 1.0), (0.0, 0.0, -1.0)]))
+    north, south = len(ring_coords), len(ring_coords) + 1
+
+    # vertex ring r lies at v = (r + 1) / rings, the poles at 0 and 1, the last column of UVs
+    # is at u = 1 but uses the vertices of the first one, which makes the seam
+    ring, segment = np.meshgrid(np.arange(rings - 2), np.arange(segments), indexing='ij')
+    ring, segment = ring.ravel(), segment.ravel()
+    following = (segment + 1) % segments
+    quads = np.column_stack((
+        ring * segments + segment,
+        ring * segments + following,
+        (ring + 1) * segments + following,
+        (ring + 1) * segments + segment,
+    ))
+    quad_uvs = np.stack((
+        np.column_stack((segment, ring + 1)),
+        np.column_stack((segment + 1, ring + 1)),
+        np.column_stack((segment + 1, ring + 2)),
+        np.column_stack((segment, ring + 2)),
+    ), axis=1)
+
+    segment = np.arange(segments)
+    following = (segment + 1) % segments
+    last = (rings - 2) * segments
+    fans = np.concatenate((
+        np.column_stack((np.full(segments, north), following, segment)),
+        np.column_stack((np.full(segments, south), last + segment, last + following)),
+    ))
+    fan_uvs = np.concatenate((
+        np.stack((np.column_stack((segment + 0.5, np.zeros(segments))), np.column_stack((segment + 1, np.ones(segments))), np.column_stack((segment, np.ones(segments)))), axis=1),
+        np.stack((np.column_stack((segment + 0.5, np.full(segments, rings))), np.column_stack((segment, np.full(segments, rings - 1))), np.column_stack((segment + 1, np.full(segments, rings - 1)))), axis=1),
+    ))
+    scale = np.array((segments, rings), dtype=np.float64)
+    quad_uvs = quad_uvs / scale
+    fan_uvs = fan_uvs / scale
+    return SyntheticMesh(coords, [quads, fans], [quad_uvs, fan_uvs])
+
+
+def atlas_mesh(triangle_count, seed=0):
+    # a grid cut into random patches, every patch is scaled, rotated and placed at random in the UV map,
+    # so the atlas has many islands and some of them overlap
+    rng = np.random.default_rng(seed)
+    size = max(int(np.sqrt(triangle_count / 2.0)), 1)
+    patch = max(size // 32, 1)
+    u, v = np.meshgrid(np.linspace(0.0, 1.0, size + 1), np.linspace(0.0, 1.0, size + 1), indexing='ij')
+    coords = np.column_stack((u.ravel(), v.ravel(), 0.1 * np.sin(8.0 * u.ravel()) * np.cos(8.0 * v.ravel())))
+    quads = grid_polygons(size, size)
+    i, j = np.meshgrid(np.arange(size), np.arange(size), indexing='ij')
+    patches = ((i // patch) * (size // patch + 1) + j // patch).ravel()
+    patch_count = patches.max() + 1
+    angles = rng.uniform(0.0, 2.0 * np.pi, patch_count)
+    scales = rng.uniform(0.5, 1.5, patch_count)
+    offsets = rng.uniform(0.0, 1.0, (patch_count, 2))
+
+    local = coords[quads][:, :, :2] * size / patch
+    cos, sin = np.cos(angles[patches])[:, np.newaxis], np.sin(angles[patches])[:, np.newaxis]
+    uvs = np.stack((cos * local[:, :, 0] - sin * local[:, :, 1], sin * local[:, :, 0] + cos * local[:, :, 1]), axis=2)
+    uvs = uvs * (scales[patches] * patch / size)[:, np.newaxis, np.newaxis] + offsets[patches][:, np.newaxis, :]
+    return SyntheticMesh(coords, [quads], [uvs])
+
+
+MESH_GENERATORS = {
+    'grid': grid_mesh,
+    'sphere': sphere_mesh,
+    'atlas': atlas_mesh,
+}
+
+
+def get_settings(operation, stretch_type='ANGLES'):
+    return OverlaySettings(operation, stretch_type, False, (0.0, 0.0, 0.0), True, True, 'EDIT', False, THEME_COLORS)
+
+
+def measure(function, repeats):
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def benchmark_mesh(mesh, repeats):
+    # every stage of a refresh is timed on its own, in the order a refresh runs them
+    stages = dict()
+    stages['extraction'] = measure(lambda: MeshArrays(mesh), repeats)
+    arrays = MeshArrays(mesh)
+    tri_coords = arrays.vertex_co[arrays.tri_vertices]
+    tri_uvs = arrays.uvs_3d(arrays.tri_loops)
+
+    loop_polygons = arrays.loop_polygons
+    stages['islands'] = measure(lambda: UVIslands(arrays.loop_vertices, arrays.loop_uvs, loop_polygons, arrays.polygon_center), repeats)
+    for stretch_type in STRETCH_TYPES:
+        stages['stretch_' + stretch_type.lower()] = measure(lambda: stretching(
+            stretch_type, tri_coords, tri_uvs, arrays.tri_loops, arrays.tri_polygons, len(arrays.loop_uvs), arrays.polygon_count
+        ), repeats)
+    stages['flips'] = measure(lambda: flipped_polygons(signed_uv_areas(tri_uvs), arrays.tri_polygons, arrays.polygon_count), repeats)
+    stages['overlap'] = measure(lambda: uv_overlaps(tri_uvs, arrays.tri_polygons, arrays.polygon_count), repeats)
+
+    # buffer packing merges the triangle corners into vertex records and builds the index buffers,
+    # every repeat packs a fresh overlay, a packed one would only split the records it already has
+    stages['buffer_packing'] = []
+    for _ in range(repeats):
+        data = OverlayData()
+        data.settings = get_settings('UV_STRETCHING')
+        changed = data.rebuild_info(arrays)
+        stages['buffer_packing'] += measure(lambda: data.prepare_buffers(changed), 1)
+    return stages
+
+
+def run(arguments):
+    results = []
+    for mesh_type in arguments.meshes:
+        for triangle_count in arguments.triangles:
+            mesh = MESH_GENERATORS[mesh_type](triangle_count)
+            stages = benchmark_mesh(mesh, arguments.repeats)
+            for stage, seconds in stages.items():
+                results.append({
+                    'mesh': mesh_type,
+                    'triangles': triangle_count,
+                    'mesh_triangles': mesh.triangle_count,
+                    'stage': stage,
+                    'seconds': min(seconds),
+                    'runs': seconds,
+                })
+                print('%-8s %9d %-20s %10.4f s' % (mesh_type, triangle_count, stage, min(seconds)), file=sys.stderr)
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'repeats': arguments.repeats,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+    return 0
+
+
+def compare(arguments):
+    # stages are matched by mesh, triangle count and name, the best run of each is compared
+    with open(arguments.baseline) as file:
+        baseline = {(r['mesh'], r['triangles'], r['stage']): r['seconds'] for r in json.load(file)['results']}
+    with open(arguments.current) as file:
+        current = json.load(file)['results']
+
+    regressions = 0
+    for result in current:
+        key = (result['mesh'], result['triangles'], result['stage'])
+        if key not in baseline:
+            continue
+        before, after = baseline[key], result['seconds']
+        change = (after - before) / before if before > 0.0 else 0.0
+        regressed = change > arguments.threshold and after - before > NOISE_SECONDS
+        regressions += regressed
+        print('%-8s %9d %-20s %10.4f s %10.4f s %+7.1f %%%s' % (*key, before, after, 100.0 * change, '  REGRESSION' if regressed else ''))
+    print('%d regressions' % regressions)
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks every stage of a VisualUV refresh on synthetic UV mapped meshes")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="time every stage and write the results as JSON")
+    run_parser.add_argument('--meshes', nargs='+', choices=MESH_TYPES, default=list(MESH_TYPES))
+    run_parser.add_argument('--triangles', nargs='+', type=int, default=list(TRIANGLE_COUNTS))
+    run_parser.add_argument('--repeats', type=int, default=REPEATS)
+    run_parser.add_argument('--output', help="JSON file for the results, printed when missing")
+    run_parser.set_defaults(function=run)
+
+    compare_parser = commands.add_parser('compare', help="compare two runs, fails when a stage regressed")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    compare_parser.set_defaults(function=compare)
+
+    arguments = parser.parse_args()
+    return arguments.function(arguments)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the kernels are imported from the add-on package, which imports without Blender
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
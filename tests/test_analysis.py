@@ -0,0 +1,145 @@
+import numpy as np
+
+from visual_uv import visualuv_analysis
+from visual_uv.visualuv_analysis import (
+    UVAnalysis,
+    polygon_mean,
+    signed_uv_areas,
+    uv_overlaps,
+)
+
+
+def grid_analysis(columns, rows, seam_column=None):
+    # a grid of quads in the XY plane, each quad owns four loops and two triangles, the UVs of
+    # the quads from the seam column on are moved away, which splits the grid into two islands
+    vertex_co = [(x, y, 0.0) for y in range(rows + 1) for x in range(columns + 1)]
+    tri_vertices, tri_loops, tri_polygons, loop_uvs = [], [], [], []
+    for row in range(rows):
+        for column in range(columns):
+            polygon = row * columns + column
+            corners = [(column, row), (column + 1, row), (column + 1, row + 1), (column, row + 1)]
+            vertices = [y * (columns + 1) + x for x, y in corners]
+            offset = 10.0 if seam_column is not None and column >= seam_column else 0.0
+            loop_uvs += [(x / columns + offset, y / rows) for x, y in corners]
+            loops = [4 * polygon + corner for corner in range(4)]
+            for a, b, c in ((0, 1, 2), (0, 2, 3)):
+                tri_vertices.append((vertices[a], vertices[b], vertices[c]))
+                tri_loops.append((loops[a], loops[b], loops[c]))
+                tri_polygons.append(polygon)
+    return UVAnalysis(vertex_co, tri_vertices, tri_loops, tri_polygons, loop_uvs, columns * rows)
+
+
+def triangles_analysis(triangle_uvs):
+    # one polygon for every triangle, the positions are the UVs
+    triangle_uvs = np.asarray(triangle_uvs, dtype=np.float32)
+    count = len(triangle_uvs)
+    vertex_co = np.zeros((3 * count, 3), dtype=np.float32)
+    vertex_co[:, :2] = triangle_uvs.reshape(-1, 2)
+    corners = np.arange(3 * count).reshape(-1, 3)
+    return UVAnalysis(vertex_co, corners, corners, np.arange(count), triangle_uvs.reshape(-1, 2), count)
+
+
+def test_angle_stretching_sums_the_angles_of_every_corner():
+    # every corner of a square quad is a right angle, split between the two triangles at the diagonal
+    corners = grid_analysis(1, 1).stretching('ANGLES')
+    assert corners.shape == (6, 2)
+    np.testing.assert_allclose(corners, np.pi / 2.0, rtol=1e-6)
+
+
+def test_angle_stretching_compares_model_and_uv_angles():
+    # moving the UV of the third corner skews the UV quad, the model keeps its right angles
+    analysis = grid_analysis(1, 1)
+    analysis.loop_uvs[2] = (1.5, 1.0)
+    corners = analysis.stretching('ANGLES')
+    np.testing.assert_allclose(corners[:, 0], np.pi / 2.0, rtol=1e-6)
+    np.testing.assert_allclose(corners[1], (np.pi / 2.0, np.pi - np.arctan2(1.0, 0.5)), rtol=1e-6)
+    np.testing.assert_allclose(corners[[0, 3], 1], np.pi / 2.0, rtol=1e-6)
+
+
+def test_area_stretching_sums_the_triangles_of_a_polygon():
+    quad = grid_analysis(1, 1)
+    quad.loop_uvs[2] = (1.5, 1.2)
+    areas = quad.stretching('AREA')
+    assert areas.shape == (6, 2)
+    # both triangles of the quad carry the polygon sum
+    np.testing.assert_array_equal(areas[:3], areas[3:])
+
+    separate = UVAnalysis(quad.vertex_co, quad.tri_vertices, quad.tri_loops, [0, 1], quad.loop_uvs, 2)
+    triangles = separate.stretching('AREA')
+    np.testing.assert_allclose(areas[0], triangles[0] + triangles[3], rtol=1e-6)
+
+
+def test_flipped_polygons():
+    analysis = grid_analysis(2, 1)
+    assert not analysis.flipped().any()
+    # mirroring one UV corner of the second quad flips one of its triangles
+    analysis.loop_uvs[6] = (0.0, 0.0)
+    np.testing.assert_array_equal(analysis.flipped(), [False, True])
+    assert signed_uv_areas(analysis.tri_uvs)[3] < 0.0
+
+
+def test_overlap_of_identical_triangles():
+    triangle = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]
+    flags, areas = triangles_analysis([triangle, triangle]).overlaps()
+    np.testing.assert_array_equal(flags, [True, True])
+    np.testing.assert_allclose(areas, 0.5, rtol=1e-6)
+
+
+def test_adjacent_triangles_do_not_overlap():
+    flags, areas = triangles_analysis([
+        [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)],
+        [(1.0, 0.0), (1.0, 1.0), (0.0, 1.0)],
+    ]).overlaps()
+    np.testing.assert_array_equal(flags, [False, False])
+    np.testing.assert_allclose(areas, 0.0, atol=1e-9)
+
+
+def test_overlap_of_contained_triangle():
+    flags, areas = triangles_analysis([
+        [(0.0, 0.0), (4.0, 0.0), (0.0, 4.0)],
+        [(1.0, 1.0), (2.0, 1.0), (1.0, 2.0)],
+    ]).overlaps()
+    np.testing.assert_array_equal(flags, [True, True])
+    np.testing.assert_allclose(areas, 0.5, rtol=1e-6)
+
+
+def test_triangles_without_area_do_not_overlap():
+    point = [(0.5, 0.5)] * 3
+    line = [(0.0, 0.0), (1.0, 1.0), (2.0, 2.0)]
+    flags, areas = triangles_analysis([point] * 100 + [line, [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]]).overlaps()
+    assert not flags.any()
+    np.testing.assert_array_equal(areas, 0.0)
+
+
+def test_overlaps_of_stacked_shells_in_small_batches(monkeypatch):
+    # every shell overlaps all other copies, the pairs of the shared cells span many batches
+    shell = grid_analysis(3, 3)
+    stacked = np.tile(shell.tri_uvs[:, :, :2], (5, 1, 1))
+    expected_flags, expected_areas = triangles_analysis(stacked).overlaps()
+    monkeypatch.setattr(visualuv_analysis, 'OVERLAP_CHUNK_SIZE', 7)
+    flags, areas = triangles_analysis(stacked).overlaps()
+    assert flags.all()
+    np.testing.assert_array_equal(flags, expected_flags)
+    # every triangle shares its whole area with each of the 4 other copies
+    np.testing.assert_allclose(areas, 4 * np.abs(signed_uv_areas(stacked)), rtol=1e-6)
+    np.testing.assert_allclose(areas, expected_areas, rtol=1e-9)
+
+
+def test_islands_of_a_seamed_grid():
+    analysis = grid_analysis(4, 2, seam_column=2)
+    islands = analysis.island_ids().reshape(2, 4)
+    assert analysis.uv_islands().count == 2
+    np.testing.assert_array_equal(islands[:, :2], islands[0, 0])
+    np.testing.assert_array_equal(islands[:, 2:], islands[0, 2])
+    assert islands[0, 0] != islands[0, 2]
+    assert grid_analysis(4, 2).uv_islands().count == 1
+
+
+def test_mesh_without_polygons():
+    analysis = UVAnalysis(np.zeros((4, 3)), np.zeros((0, 3)), np.zeros((0, 3)), [], np.zeros((0, 2)))
+    assert len(analysis.island_ids()) == 0
+    assert len(analysis.flipped()) == 0
+    assert analysis.stretching('EDGE_LENGTH').shape == (0, 2)
+    assert len(polygon_mean(np.zeros(0), np.zeros(0, dtype=np.int32), 0)) == 0
+    flags, areas = uv_overlaps(np.zeros((0, 3, 3)), np.zeros(0, dtype=np.int32), 0)
+    assert len(flags) == 0 and len(areas) == 0
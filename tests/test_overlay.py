@@ -0,0 +1,60 @@
+import copy
+
+import numpy as np
+import pytest
+
+from benchmarks.benchmark import get_settings, grid_mesh
+from visual_uv.visualuv_mesh import MeshArrays
+from visual_uv.visualuv_overlay import OverlayData, OverlayJob
+
+OPERATIONS = ('NONE', 'UV_STRETCHING', 'UV_ISLANDS', 'UV_NORMALS', 'UV_OVERLAP')
+# index buffer => vertex buffers it draws
+INDEXED_BUFFERS = {
+    'triangles': ('verts', 'normals', 'input', 'vert_directions', 'tex_coords', 'face_colors'),
+    'face_triangles': ('verts',),
+    'uv_triangles': ('uv_positions', 'input'),
+    'edges': ('wireframe_coords', 'wireframe_normals', 'wireframe_vertex_colors'),
+    'edge': ('wireframe_coords',),
+    'edge_select': ('wireframe_coords',),
+    'seam': ('wireframe_coords',),
+}
+
+
+def drawn(buffers):
+    # the data every index buffer draws, records and wireframe points may be numbered differently
+    return {
+        (index, name): buffers.vertex_data[name][2][buffers.index_data[index][1]]
+        for index, names in INDEXED_BUFFERS.items()
+        for name in names
+    }
+
+
+def edited(arrays, vertices=(), uv_vertices=(), loops=(), polygons=()):
+    # the arrays are never modified in place, like a new snapshot of the mesh, moving a UV vertex
+    # moves all of its loops together and keeps them in one vertex record
+    arrays = copy.copy(arrays)
+    arrays.vertex_co = arrays.vertex_co.copy()
+    arrays.vertex_co[list(vertices), 2] += 0.25
+    arrays.loop_uvs = arrays.loop_uvs.copy()
+    arrays.loop_uvs[np.isin(arrays.loop_vertices, uv_vertices)] += 0.01
+    arrays.loop_uvs[list(loops)] += 0.01
+    arrays.polygon_select = arrays.polygon_select.copy()
+    arrays.polygon_select[list(polygons)] = True
+    return arrays
+
+
+@pytest.mark.parametrize('operation', OPERATIONS)
+def test_updates_match_a_rebuild(operation):
+    settings = get_settings(operation)
+    # the UV Editor only draws selected faces
+    arrays = MeshArrays(grid_mesh(200))
+    arrays = edited(arrays, polygons=range(0, arrays.polygon_count, 2))
+    data = OverlayData()
+    buffers = data.compute(OverlayJob(arrays, settings))
+    # UV edits, a vertex move and a selection change, each patched into the previous buffers
+    for changes in ({'uv_vertices': (12,)}, {'loops': (5, 6, 40)}, {'vertices': (3, 17)}, {'polygons': (1, 9)}):
+        arrays = edited(arrays, **changes)
+        buffers = data.compute(OverlayJob(arrays, settings)).merge(buffers)
+        rebuilt = drawn(OverlayData().compute(OverlayJob(arrays, settings)))
+        for key, values in drawn(buffers).items():
+            np.testing.assert_array_equal(values, rebuilt[key], err_msg=str((changes, key)))
@@ -12,27 +12,52 @@
 # You should have received a copy of the GNU General Public License along with this program. If not, see
 # <https://www.gnu.org/licenses/>.
 
-import bpy
-from bpy.props import (
-    BoolProperty,
-    FloatVectorProperty,
-    FloatProperty,
-    EnumProperty,
-    PointerProperty,
-    IntProperty,
-)
-
-from .visualuv_ui import VISUALUV_PT_3d_view, VISUALUV_PT_2d_view
-from .visualuv_ops import (
-    VISUALUV_OT_update,
-    VISUALUV_OT_toggle_texture,
-    VISUALUV_OT_toggle_stretching,
-    VISUALUV_OT_toggle_islands,
-    VISUALUV_OT_toggle_normals,
-    VISUALUV_OT_toggle_overlap,
-    VISUALUV_OT_overlay,
-)
-from .visualuv_props import VISUALUV_ObjectProperties, VISUALUV_WindowManagerProperties
+try:
+    import bpy
+except ImportError:
+    # outside of Blender only the bpy-free modules, like visualuv_analysis, can be imported
+    bpy = None
+
+if bpy is not None:
+    from bpy.props import (
+        BoolProperty,
+        FloatVectorProperty,
+        FloatProperty,
+        EnumProperty,
+        PointerProperty,
+        IntProperty,
+    )
+
+    from .visualuv_ui import VISUALUV_PT_3d_view, VISUALUV_PT_2d_view
+    from .visualuv_ops import (
+        VISUALUV_OT_update,
+        VISUALUV_OT_toggle_texture,
+        VISUALUV_OT_toggle_stretching,
+        VISUALUV_OT_toggle_islands,
+        VISUALUV_OT_toggle_normals,
+        VISUALUV_OT_toggle_overlap,
+        VISUALUV_OT_overlay,
+        TEXTURE_CACHE,
+        depsgraph_update_post,
+        load_pre,
+        clear_overlays,
+    )
+    from .visualuv_props import VISUALUV_ObjectProperties, VISUALUV_Preferences
+    from .visualuv_scheduler import cancel_refreshes
+
+    classes = (
+        VISUALUV_PT_3d_view,
+        VISUALUV_PT_2d_view,
+        VISUALUV_OT_update,
+        VISUALUV_OT_toggle_texture,
+        VISUALUV_OT_toggle_stretching,
+        VISUALUV_OT_toggle_islands,
+        VISUALUV_OT_toggle_normals,
+        VISUALUV_OT_toggle_overlap,
+        VISUALUV_OT_overlay,
+        VISUALUV_ObjectProperties,
+        VISUALUV_Preferences,
+    )
 
 
 bl_info = {
@@ -47,33 +72,24 @@ bl_info = {
     "category": "Object",
 }
 
-classes = (
-    VISUALUV_PT_3d_view,
-    VISUALUV_PT_2d_view,
-    VISUALUV_OT_update,
-    VISUALUV_OT_toggle_texture,
-    VISUALUV_OT_toggle_stretching,
-    VISUALUV_OT_toggle_islands,
-    VISUALUV_OT_toggle_normals,
-    VISUALUV_OT_toggle_overlap,
-    VISUALUV_OT_overlay,
-    VISUALUV_ObjectProperties,
-    VISUALUV_WindowManagerProperties,
-)
-
 
 def register():
     for c in classes:
         bpy.utils.register_class(c)
     bpy.types.Object.visualuv = PointerProperty(type=VISUALUV_ObjectProperties)
-    bpy.types.WindowManager.visualuv = PointerProperty(
-        type=VISUALUV_WindowManagerProperties
-    )
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post)
+    bpy.app.handlers.load_pre.append(load_pre)
 
 
 def unregister():
-    del bpy.types.WindowManager.visualuv
+    if depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post)
+    if load_pre in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(load_pre)
     del bpy.types.Object.visualuv
+    clear_overlays()
+    cancel_refreshes()
+    TEXTURE_CACHE.clear()
 
     for c in classes:
         bpy.utils.unregister_class(c)
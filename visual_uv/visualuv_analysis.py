@@ -0,0 +1,416 @@
+import numpy as np
+
+
+def triangle_angles(tri_coords):
+    # tri_coords has the shape (triangles, 3, dimensions), the result holds the angle at every corner
+    coords = np.asarray(tri_coords, dtype=np.float64)
+    edges_next = np.roll(coords, -1, axis=1) - coords
+    edges_prev = np.roll(coords, -2, axis=1) - coords
+    lengths = np.linalg.norm(edges_next, axis=2) * np.linalg.norm(edges_prev, axis=2)
+    dots = np.einsum('ijk,ijk->ij', edges_next, edges_prev)
+    valid = lengths > 0.0
+    cosines = np.divide(dots, lengths, out=np.zeros_like(dots), where=valid)
+    return np.where(valid, np.arccos(np.clip(cosines, -1.0, 1.0)), 0.0)
+
+
+def angle_stretching(tri_coords, tri_uvs, tri_loops, loop_count):
+    # a polygon never uses one vertex twice, so every (vertex, polygon) corner is exactly one loop
+    # and the angles of all triangles sharing the corner are summed per loop index
+    loops = np.asarray(tri_loops).ravel()
+    corners = np.zeros((loop_count, 2), dtype=np.float64)
+    corners[:, 0] = np.bincount(loops, weights=triangle_angles(tri_coords).ravel(), minlength=loop_count)
+    corners[:, 1] = np.bincount(loops, weights=triangle_angles(tri_uvs).ravel(), minlength=loop_count)
+    return corners[loops].astype(np.float32)
+
+
+def normalized_rows(vectors):
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0.0)
+
+
+def triangle_sides(tri_coords):
+    # side k goes from corner k to corner k + 1
+    coords = np.asarray(tri_coords, dtype=np.float64)
+    return np.roll(coords, -1, axis=1) - coords
+
+
+def polygon_sum(values, tri_polygons, polygon_count):
+    return np.bincount(tri_polygons, weights=values, minlength=polygon_count)
+
+
+def polygon_mean(values, tri_polygons, polygon_count):
+    counts = np.bincount(tri_polygons, minlength=polygon_count)
+    sums = polygon_sum(values, tri_polygons, polygon_count)
+    # bincount returns integers for empty input, the mean is always a float
+    return np.divide(sums, counts, out=np.zeros(polygon_count, dtype=np.float64), where=counts > 0)
+
+
+def area_stretching(tri_coords, tri_uvs, tri_polygons, polygon_count):
+    # both triangles are rebuilt from the UV side directions, scaled by their normalized side lengths,
+    # so only the relative proportions of the sides are compared
+    uv_sides = triangle_sides(tri_uvs)[:, :, :2]
+    uv_directions = normalized_rows(uv_sides)
+    uv_lengths = normalized_rows(np.linalg.norm(uv_sides, axis=2))
+    tri_lengths = normalized_rows(np.linalg.norm(triangle_sides(tri_coords), axis=2))
+
+    areas = np.zeros((len(tri_polygons), 2), dtype=np.float64)
+    for i, lengths in enumerate((tri_lengths, uv_lengths)):
+        points = np.cumsum(lengths[:, :, np.newaxis] * uv_directions, axis=1)
+        edge1 = points[:, 1] - points[:, 0]
+        edge2 = points[:, 2] - points[:, 0]
+        areas[:, i] = np.abs(edge1[:, 0] * edge2[:, 1] - edge1[:, 1] * edge2[:, 0]) / 2.0
+
+    polygons = np.zeros((polygon_count, 2), dtype=np.float64)
+    polygons[:, 0] = polygon_sum(areas[:, 0], tri_polygons, polygon_count)
+    polygons[:, 1] = polygon_sum(areas[:, 1], tri_polygons, polygon_count)
+    return np.repeat(polygons[tri_polygons], 3, axis=0).astype(np.float32)
+
+
+def edge_length_stretching(tri_coords, tri_uvs, tri_polygons, polygon_count):
+    # every triangle side contributes its length ratio, the polygon gets the mean of all of them
+    tri_lengths = normalized_rows(np.linalg.norm(triangle_sides(tri_coords), axis=2))
+    uv_lengths = normalized_rows(np.linalg.norm(triangle_sides(tri_uvs), axis=2))
+    valid = (tri_lengths > 0.0) & (uv_lengths > 0.0)
+    longer = np.maximum(tri_lengths, uv_lengths)
+    shorter = np.minimum(tri_lengths, uv_lengths)
+    divisions = np.divide(longer, shorter, out=np.zeros_like(longer), where=valid)
+
+    polygons = np.ones((polygon_count, 2), dtype=np.float64)
+    polygons[:, 0] = polygon_mean(divisions.sum(axis=1) / 3.0, tri_polygons, polygon_count)
+    return np.repeat(polygons[tri_polygons], 3, axis=0).astype(np.float32)
+
+
+def stretching(stretch_type, tri_coords, tri_uvs, tri_loops, tri_polygons, loop_count, polygon_count):
+    if stretch_type == 'ANGLES':
+        return angle_stretching(tri_coords, tri_uvs, tri_loops, loop_count)
+    elif stretch_type == 'AREA':
+        return area_stretching(tri_coords, tri_uvs, tri_polygons, polygon_count)
+    else:
+        return edge_length_stretching(tri_coords, tri_uvs, tri_polygons, polygon_count)
+
+
+def signed_uv_areas(tri_uvs):
+    # positive for counter-clockwise UV triangles, negative for flipped ones
+    uvs = np.asarray(tri_uvs, dtype=np.float64)
+    edge1 = uvs[:, 1, :2] - uvs[:, 0, :2]
+    edge2 = uvs[:, 2, :2] - uvs[:, 0, :2]
+    return (edge1[:, 0] * edge2[:, 1] - edge1[:, 1] * edge2[:, 0]) / 2.0
+
+
+def uv_normal_input(signed_areas, color_front, color_flipped):
+    colors = np.zeros((len(signed_areas), 2), dtype=np.float32)
+    colors[:, 0] = np.where(signed_areas >= 0.0, color_front, color_flipped)
+    return np.repeat(colors, 3, axis=0)
+
+
+def flipped_polygons(signed_areas, tri_polygons, polygon_count):
+    # a polygon counts as flipped as soon as one of its triangles is
+    flipped = np.zeros(polygon_count, dtype=bool)
+    flipped[tri_polygons[signed_areas < 0.0]] = True
+    return flipped
+
+
+UV_ISLAND_EPSILON = 1e-6
+
+
+def connected_components(node_count, sources, targets):
+    # array backed union-find, every node ends up labeled by the lowest node of its component
+    labels = np.arange(node_count)
+    while True:
+        roots = np.minimum(labels[sources], labels[targets])
+        hooked = labels.copy()
+        np.minimum.at(hooked, labels[sources], roots)
+        np.minimum.at(hooked, labels[targets], roots)
+        while True:
+            compressed = hooked[hooked]
+            if np.array_equal(compressed, hooked):
+                break
+            hooked = compressed
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+class UVIslands():
+
+    # polygons are linked when they share a corner with the same vertex and the same UV coordinate
+    def __init__(self, loop_vertices, loop_uvs, loop_polygons, polygon_centers, epsilon=UV_ISLAND_EPSILON):
+        polygon_count = len(polygon_centers)
+        quantized = np.floor(np.asarray(loop_uvs, dtype=np.float64) / epsilon + 0.5).astype(np.int64)
+        corner_keys = np.column_stack((loop_vertices, quantized))
+        if len(corner_keys):
+            _, corners = np.unique(corner_keys, axis=0, return_inverse=True)
+            corners = corners.ravel()
+            first_polygons = np.full(corners.max() + 1, polygon_count)
+            np.minimum.at(first_polygons, corners, loop_polygons)
+            labels = connected_components(polygon_count, loop_polygons, first_polygons[corners])
+        else:
+            labels = np.arange(polygon_count)
+
+        # islands are numbered by their lowest polygon index
+        _, self.polygon_islands, self.sizes = np.unique(labels, return_inverse=True, return_counts=True)
+        self.polygon_islands = self.polygon_islands.ravel().astype(np.int32)
+        self.count = len(self.sizes)
+
+        centers = np.asarray(polygon_centers, dtype=np.float64)
+        self.centroids = np.zeros((self.count, 3), dtype=np.float64)
+        for axis in range(3):
+            self.centroids[:, axis] = np.bincount(self.polygon_islands, weights=centers[:, axis], minlength=self.count)
+        self.centroids /= np.maximum(self.sizes, 1)[:, np.newaxis]
+
+    def explosion_directions(self, origin):
+        directions = self.centroids - np.asarray(origin, dtype=np.float64)
+        lengths = np.linalg.norm(directions, axis=1, keepdims=True)
+        directions = np.divide(directions, lengths, out=np.zeros_like(directions), where=lengths > 0.0)
+        directions[lengths[:, 0] == 0.0] = (0.0, 0.0, 1.0)
+        return directions.astype(np.float32)
+
+
+OVERLAP_EPSILON = 1e-6
+OVERLAP_CHUNK_SIZE = 1 << 18
+
+
+def cross_2d(u, v):
+    return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+
+
+def candidate_pairs(tri_uvs, tri_polygons):
+    # uniform grid broad phase, every triangle is registered in all cells touched by its bounding box,
+    # yields the pairs whose boxes touch in batches made from at most OVERLAP_CHUNK_SIZE pairs of cell
+    # entries, so a cell full of stacked triangles never holds all of its pairs at once
+
+    # triangles without area cannot overlap anything, the others all have a size
+    kept = np.flatnonzero(signed_uv_areas(tri_uvs) != 0.0)
+    if len(kept) < 2:
+        return
+    tri_uvs = tri_uvs[kept]
+    tri_polygons = tri_polygons[kept]
+    mins = np.minimum(np.minimum(tri_uvs[:, 0], tri_uvs[:, 1]), tri_uvs[:, 2])
+    maxs = np.maximum(np.maximum(tri_uvs[:, 0], tri_uvs[:, 1]), tri_uvs[:, 2])
+    cell_size = np.median(np.maximum(maxs[:, 0] - mins[:, 0], maxs[:, 1] - mins[:, 1]))
+    origin = mins.min(axis=0)
+    first_cells = np.floor((mins - origin) / cell_size).astype(np.int64)
+    last_cells = np.floor((maxs - origin) / cell_size).astype(np.int64)
+    spans = last_cells - first_cells + 1
+    cell_counts = spans[:, 0] * spans[:, 1]
+
+    triangles = np.repeat(np.arange(len(kept)), cell_counts)
+    local = np.arange(len(triangles)) - np.repeat(np.cumsum(cell_counts) - cell_counts, cell_counts)
+    cells = np.column_stack((
+        first_cells[triangles, 0] + local % spans[triangles, 0],
+        first_cells[triangles, 1] + local // spans[triangles, 0]
+    ))
+    cell_keys = cells[:, 0] * (last_cells[:, 1].max() + 1) + cells[:, 1]
+
+    # every entry is paired with all following entries of the same cell, the pairs are numbered
+    # entry by entry and every batch finds the entries of its pair numbers
+    order = np.argsort(cell_keys, kind='stable')
+    cell_keys = cell_keys[order]
+    cells = cells[order]
+    triangles = triangles[order]
+    partner_counts = np.searchsorted(cell_keys, cell_keys, side='right') - np.arange(len(triangles)) - 1
+    pair_ends = np.cumsum(partner_counts)
+    for start in range(0, int(pair_ends[-1]), OVERLAP_CHUNK_SIZE):
+        pairs = np.arange(start, min(start + OVERLAP_CHUNK_SIZE, int(pair_ends[-1])))
+        entries = np.searchsorted(pair_ends, pairs, side='right')
+        partners = pairs - (pair_ends[entries] - partner_counts[entries]) + entries + 1
+        firsts = triangles[entries]
+        seconds = triangles[partners]
+
+        keep = tri_polygons[firsts] != tri_polygons[seconds]
+        keep &= np.all(mins[firsts] <= maxs[seconds], axis=1) & np.all(mins[seconds] <= maxs[firsts], axis=1)
+        firsts, seconds, pair_cells = firsts[keep], seconds[keep], cells[entries[keep]]
+        # pairs sharing several cells are only reported by the cell holding the corner of their common box
+        corners = np.floor((np.maximum(mins[firsts], mins[seconds]) - origin) / cell_size).astype(np.int64)
+        keep = np.all(corners == pair_cells, axis=1)
+        yield kept[firsts[keep]], kept[seconds[keep]]
+
+
+def separated(firsts, seconds, epsilon):
+    # separating axis test on the edge normals of both triangles, overlaps thinner than epsilon
+    # of the projected triangles are ignored, so neighbouring triangles count as separated
+    result = np.zeros(len(firsts), dtype=bool)
+    for triangles in (firsts, seconds):
+        for i in range(3):
+            edge = triangles[:, (i + 1) % 3] - triangles[:, i]
+            first = [edge[:, 0] * firsts[:, k, 1] - edge[:, 1] * firsts[:, k, 0] for k in range(3)]
+            second = [edge[:, 0] * seconds[:, k, 1] - edge[:, 1] * seconds[:, k, 0] for k in range(3)]
+            first_min, first_max = np.minimum(np.minimum(*first[:2]), first[2]), np.maximum(np.maximum(*first[:2]), first[2])
+            second_min, second_max = np.minimum(np.minimum(*second[:2]), second[2]), np.maximum(np.maximum(*second[:2]), second[2])
+            overlap = np.minimum(first_max, second_max) - np.maximum(first_min, second_min)
+            spans = np.minimum(first_max - first_min, second_max - second_min)
+            result |= overlap <= epsilon * spans
+    return result
+
+
+def clip_by_edge(polygons, counts, start, end):
+    # one Sutherland-Hodgman step, keeps the part of every convex polygon left of its edge
+    size = polygons.shape[1]
+    indices = np.arange(size)[np.newaxis, :]
+    following = np.take_along_axis(polygons, ((indices + 1) % np.maximum(counts, 1)[:, np.newaxis])[..., np.newaxis], axis=1)
+    direction = (end - start)[:, np.newaxis]
+    current_side = cross_2d(direction, polygons - start[:, np.newaxis])
+    following_side = cross_2d(direction, following - start[:, np.newaxis])
+    valid = indices < counts[:, np.newaxis]
+    inside = (current_side >= 0.0) & valid
+    crossing = ((current_side >= 0.0) != (following_side >= 0.0)) & valid
+    t = np.divide(current_side, current_side - following_side, out=np.zeros_like(current_side), where=crossing)
+    intersections = polygons + (following - polygons) * t[..., np.newaxis]
+
+    candidates = np.stack((polygons, intersections), axis=2).reshape(len(polygons), 2 * size, 2)
+    keep = np.stack((inside, crossing), axis=2).reshape(len(polygons), 2 * size)
+    rows, columns = np.nonzero(keep)
+    targets = np.cumsum(keep, axis=1) - 1
+    clipped = np.zeros((len(polygons), size + 1, 2), dtype=polygons.dtype)
+    clipped[rows, targets[rows, columns]] = candidates[rows, columns]
+    return clipped, keep.sum(axis=1)
+
+
+def polygon_areas(polygons, counts):
+    indices = np.arange(polygons.shape[1])[np.newaxis, :]
+    following = np.take_along_axis(polygons, ((indices + 1) % np.maximum(counts, 1)[:, np.newaxis])[..., np.newaxis], axis=1)
+    terms = np.where(indices < counts[:, np.newaxis], cross_2d(polygons, following), 0.0)
+    return np.abs(terms.sum(axis=1)) / 2.0
+
+
+def triangle_overlap_areas(subjects, clips):
+    # exact narrow phase, the subject triangles are clipped by the edges of counter-clockwise clip triangles
+    clips = np.where((signed_uv_areas(clips) < 0.0)[:, np.newaxis, np.newaxis], clips[:, ::-1], clips)
+    polygons = subjects
+    counts = np.full(len(subjects), 3)
+    for i in range(3):
+        polygons, counts = clip_by_edge(polygons, counts, clips[:, i], clips[:, (i + 1) % 3])
+    return polygon_areas(polygons, counts)
+
+
+def pair_overlap_areas(uvs, firsts, seconds, epsilon=OVERLAP_EPSILON):
+    # UV area shared by every candidate pair, zero for pairs which are separated or only touch
+    overlaps = np.zeros(len(firsts), dtype=np.float64)
+    for chunk in range(0, len(firsts), OVERLAP_CHUNK_SIZE):
+        first = firsts[chunk:chunk + OVERLAP_CHUNK_SIZE]
+        second = seconds[chunk:chunk + OVERLAP_CHUNK_SIZE]
+        candidates = np.flatnonzero(~separated(uvs[first], uvs[second], epsilon))
+        first, second = first[candidates], second[candidates]
+        overlap = triangle_overlap_areas(uvs[first], uvs[second])
+        # triangles touching along an edge or in a point produce only rounding noise
+        triangle_areas = np.minimum(np.abs(signed_uv_areas(uvs[first])), np.abs(signed_uv_areas(uvs[second])))
+        overlapping = (overlap > epsilon * triangle_areas) & (overlap > 0.0)
+        overlaps[chunk + candidates[overlapping]] = overlap[overlapping]
+    return overlaps
+
+
+def polygon_overlaps(flags, areas, overlaps, firsts, seconds, tri_polygons):
+    # adds the overlaps of a batch of pairs to the polygon flags and areas
+    overlapping = overlaps > 0.0
+    for triangles in (firsts, seconds):
+        polygons = tri_polygons[triangles[overlapping]]
+        flags[polygons] = True
+        areas += np.bincount(polygons, weights=overlaps[overlapping], minlength=len(areas))
+
+
+def uv_overlaps(tri_uvs, tri_polygons, polygon_count, epsilon=OVERLAP_EPSILON):
+    # returns per-polygon overlap flags and the UV area each polygon shares with other polygons
+    uvs = np.asarray(tri_uvs, dtype=np.float64)[:, :, :2]
+    flags = np.zeros(polygon_count, dtype=bool)
+    areas = np.zeros(polygon_count, dtype=np.float64)
+    for firsts, seconds in candidate_pairs(uvs, tri_polygons):
+        overlaps = pair_overlap_areas(uvs, firsts, seconds, epsilon)
+        polygon_overlaps(flags, areas, overlaps, firsts, seconds, tri_polygons)
+    return flags, areas
+
+
+FNV_PRIME = np.uint32(0x01000193)
+# peak memory of corner_records for every corner, two copies of the attribute bits take
+# 8 bytes per attribute component, the sort keys, order and records take the rest
+RECORD_COMPONENT_BYTES = 8
+RECORD_CORNER_BYTES = 48
+
+
+def corner_records(vertices, *attributes):
+    # merges triangle corners with the same vertex and bit-identical attributes into one vertex record,
+    # returns the first corner of every record and the record of every corner. Corners are sorted by
+    # vertex and a hash of the attribute bits, a hash collision only leaves a record unmerged
+    vertices = np.asarray(vertices).ravel()
+    # adding zero turns -0.0 into 0.0, so equal values always have equal bits
+    bits = np.column_stack([(np.asarray(attribute, dtype=np.float32) + np.float32(0.0)).view(np.uint32) for attribute in attributes])
+    hashes = np.zeros(len(vertices), dtype=np.uint32)
+    for column in bits.T:
+        hashes = (hashes ^ column) * FNV_PRIME
+    keys = (vertices.astype(np.int64) << 32) | hashes
+    order = np.argsort(keys)
+    keys = keys[order]
+    bits = bits[order]
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = (keys[1:] != keys[:-1]) | np.any(bits[1:] != bits[:-1], axis=1)
+    records = np.empty(len(order), dtype=np.int32)
+    records[order] = np.cumsum(starts) - 1
+    return order[starts], records
+
+
+def corner_records_bytes(corner_count, components):
+    # most memory corner_records takes at once for the corners and attribute components given
+    return corner_count * (RECORD_COMPONENT_BYTES * components + RECORD_CORNER_BYTES)
+
+
+class UVAnalysis():
+
+    # every VisualUV metric of one mesh from plain arrays, without Blender. Loop triangles index
+    # the vertex positions, the loops and the polygons, every loop has one UV coordinate
+    def __init__(self, vertex_co, tri_vertices, tri_loops, tri_polygons, loop_uvs, polygon_count=None):
+        self.vertex_co = np.asarray(vertex_co, dtype=np.float32)
+        self.tri_vertices = np.asarray(tri_vertices, dtype=np.int32).reshape(-1, 3)
+        self.tri_loops = np.asarray(tri_loops, dtype=np.int32).reshape(-1, 3)
+        self.tri_polygons = np.asarray(tri_polygons, dtype=np.int32).ravel()
+        self.loop_uvs = np.asarray(loop_uvs, dtype=np.float32).reshape(-1, 2)
+        if polygon_count is None:
+            polygon_count = int(self.tri_polygons.max()) + 1 if len(self.tri_polygons) else 0
+        self.polygon_count = polygon_count
+        self.islands = None
+
+    @property
+    def tri_coords(self):
+        return self.vertex_co[self.tri_vertices]
+
+    @property
+    def tri_uvs(self):
+        # the kernels take UV coordinates as 3D points with zero depth
+        uvs = np.zeros((len(self.tri_loops), 3, 3), dtype=np.float32)
+        uvs[:, :, :2] = self.loop_uvs[self.tri_loops]
+        return uvs
+
+    def uv_islands(self):
+        if self.islands is None:
+            # loops and polygons are only known through the triangles using them
+            loops = self.tri_loops.ravel()
+            loop_vertices = np.zeros(len(self.loop_uvs), dtype=np.int32)
+            loop_vertices[loops] = self.tri_vertices.ravel()
+            loop_polygons = np.zeros(len(self.loop_uvs), dtype=np.int32)
+            loop_polygons[loops] = np.repeat(self.tri_polygons, 3)
+            used = np.zeros(len(self.loop_uvs), dtype=bool)
+            used[loops] = True
+            # the polygon center is the mean of its vertices
+            corners = np.flatnonzero(used)
+            centers = np.zeros((self.polygon_count, 3), dtype=np.float64)
+            for axis in range(3):
+                centers[:, axis] = polygon_mean(self.vertex_co[loop_vertices[corners], axis], loop_polygons[corners], self.polygon_count)
+            self.islands = UVIslands(loop_vertices[corners], self.loop_uvs[corners], loop_polygons[corners], centers)
+        return self.islands
+
+    def island_ids(self):
+        return self.uv_islands().polygon_islands
+
+    def explosion_directions(self, origin=(0.0, 0.0, 0.0)):
+        # one direction for every polygon, pointing from the origin to the center of its island
+        islands = self.uv_islands()
+        return islands.explosion_directions(origin)[islands.polygon_islands]
+
+    def stretching(self, stretch_type='ANGLES'):
+        # two values for every triangle corner, compared by the shaders
+        return stretching(stretch_type, self.tri_coords, self.tri_uvs, self.tri_loops, self.tri_polygons, len(self.loop_uvs), self.polygon_count)
+
+    def flipped(self):
+        return flipped_polygons(signed_uv_areas(self.tri_uvs), self.tri_polygons, self.polygon_count)
+
+    def overlaps(self):
+        # per-polygon overlap flags and the UV area shared with other polygons
+        return uv_overlaps(self.tri_uvs, self.tri_polygons, self.polygon_count)
@@ -0,0 +1,191 @@
+import copy
+import numpy as np
+
+
+def foreach_get(collection, attribute, dtype, width=1):
+    array = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attribute, array)
+    if width > 1:
+        return array.reshape(-1, width)
+    return array
+
+
+# arrays which have to match for the previous overlay buffers to be patched instead of rebuilt
+TOPOLOGY_ATTRIBUTES = (
+    'edge_vertices',
+    'loop_vertices',
+    'loop_edges',
+    'polygon_loop_start',
+    'polygon_loop_total',
+    'polygon_hide',
+    'tri_vertices',
+    'tri_loops',
+    'tri_polygons',
+)
+
+# kinds of changes of a tracked object, a transform change needs no recompute
+GEOMETRY_CHANGE = 'GEOMETRY'
+UV_CHANGE = 'UV'
+SELECTION_CHANGE = 'SELECTION'
+TRANSFORM_CHANGE = 'TRANSFORM'
+
+# flags which change with the selection only
+SELECTION_ATTRIBUTES = (
+    'vertex_select',
+    'edge_select',
+    'edge_seam',
+    'polygon_select',
+)
+
+
+class MeshArrays():
+
+    # pulls everything VisualUV needs from the mesh in bulk, instead of reading it item by item
+    def __init__(self, mesh):
+        mesh.calc_loop_triangles()
+        uv_layer = mesh.uv_layers.active
+
+        self.vertex_co = foreach_get(mesh.vertices, "co", np.float32, 3)
+        self.vertex_normals = foreach_get(mesh.vertices, "normal", np.float32, 3)
+        self.vertex_select = foreach_get(mesh.vertices, "select", bool)
+
+        self.edge_vertices = foreach_get(mesh.edges, "vertices", np.int32, 2)
+        self.edge_select = foreach_get(mesh.edges, "select", bool)
+        self.edge_seam = foreach_get(mesh.edges, "use_seam", bool)
+
+        self.loop_vertices = foreach_get(mesh.loops, "vertex_index", np.int32)
+        self.loop_edges = foreach_get(mesh.loops, "edge_index", np.int32)
+        # Blender does not keep UV references, the attribute data is copied here
+        self.loop_uvs = foreach_get(mesh.attributes[uv_layer.name].data, "vector", np.float32, 2)
+
+        self.polygon_loop_start = foreach_get(mesh.polygons, "loop_start", np.int32)
+        self.polygon_loop_total = foreach_get(mesh.polygons, "loop_total", np.int32)
+        self.polygon_center = foreach_get(mesh.polygons, "center", np.float32, 3)
+        self.polygon_hide = foreach_get(mesh.polygons, "hide", bool)
+        self.polygon_select = foreach_get(mesh.polygons, "select", bool)
+
+        self.tri_vertices = foreach_get(mesh.loop_triangles, "vertices", np.int32, 3)
+        self.tri_loops = foreach_get(mesh.loop_triangles, "loops", np.int32, 3)
+        self.tri_polygons = foreach_get(mesh.loop_triangles, "polygon_index", np.int32)
+
+    @property
+    def loop_polygons(self):
+        # polygons own consecutive ranges of loops
+        return np.repeat(np.arange(self.polygon_count, dtype=np.int32), self.polygon_loop_total)
+
+    @property
+    def polygon_count(self):
+        return len(self.polygon_hide)
+
+    def uvs_3d(self, loops):
+        # the shaders take UV coordinates as VEC3 with zero depth
+        uvs = np.zeros((*np.shape(loops), 3), dtype=np.float32)
+        uvs[..., :2] = self.loop_uvs[loops]
+        return uvs
+
+    def has_same_topology(self, other):
+        return all(np.array_equal(getattr(self, name), getattr(other, name)) for name in TOPOLOGY_ATTRIBUTES)
+
+    def changed_vertices(self, previous):
+        moved = np.any(self.vertex_co != previous.vertex_co, axis=1)
+        return moved | np.any(self.vertex_normals != previous.vertex_normals, axis=1)
+
+    def changed_uvs(self, previous):
+        return np.any(self.loop_uvs != previous.loop_uvs, axis=1)
+
+    def with_selection(self, selection):
+        # the arrays are never modified in place, a copy only swaps the selection flags
+        arrays = copy.copy(self)
+        for name in SELECTION_ATTRIBUTES:
+            setattr(arrays, name, getattr(selection, name))
+        return arrays
+
+
+class MeshSelection():
+
+    # state of the original mesh, tells apart refreshes where only the selection changed
+    def __init__(self, mesh):
+        self.vertex_co = foreach_get(mesh.vertices, "co", np.float32, 3)
+        self.loop_uvs = foreach_get(mesh.attributes[mesh.uv_layers.active.name].data, "vector", np.float32, 2)
+        self.polygon_hide = foreach_get(mesh.polygons, "hide", bool)
+        self.vertex_select = foreach_get(mesh.vertices, "select", bool)
+        self.edge_select = foreach_get(mesh.edges, "select", bool)
+        self.edge_seam = foreach_get(mesh.edges, "use_seam", bool)
+        self.polygon_select = foreach_get(mesh.polygons, "select", bool)
+
+    def changes(self, previous):
+        changes = set()
+        if not np.array_equal(self.vertex_co, previous.vertex_co) or not np.array_equal(self.polygon_hide, previous.polygon_hide):
+            changes.add(GEOMETRY_CHANGE)
+        if not np.array_equal(self.loop_uvs, previous.loop_uvs):
+            changes.add(UV_CHANGE)
+        if not all(np.array_equal(getattr(self, name), getattr(previous, name)) for name in SELECTION_ATTRIBUTES):
+            changes.add(SELECTION_CHANGE)
+        return changes
+
+    def matches(self, arrays):
+        # selection flags can only be copied when the evaluated mesh has the same elements as the original
+        return all(len(getattr(self, name)) == len(getattr(arrays, name)) for name in SELECTION_ATTRIBUTES)
+
+
+class MeshSource():
+
+    # hands out the mesh arrays of one object, an evaluated mesh is freed right after it was read,
+    # and the last extraction is reused as long as the geometry did not change
+    def __init__(self):
+        self.arrays = None
+        self.selection = None
+        self.extractions = 0
+        self.reuses = 0
+
+    @staticmethod
+    def uses_original(obj):
+        # without modifiers and shape keys the evaluated mesh equals the original one, which
+        # update_from_editmode already synced with the edit-mode mesh
+        if obj.data.shape_keys is not None:
+            return False
+        for modifier in obj.modifiers:
+            if modifier.show_viewport and (obj.mode != 'EDIT' or modifier.show_in_editmode):
+                return False
+        return True
+
+    def extract(self, context, obj):
+        if self.uses_original(obj):
+            return MeshArrays(obj.data)
+        depsgraph = context.evaluated_depsgraph_get()
+        # this new object might differ from the original, but we only need it for the mesh
+        evaluated = obj.evaluated_get(depsgraph)
+        try:
+            return MeshArrays(evaluated.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph))
+        finally:
+            evaluated.to_mesh_clear()
+
+    def get_arrays(self, context, obj, selection, reusable=True):
+        # when only selection flags changed since the last snapshot, the extracted mesh is still valid,
+        # the new flags are copied into a copy of the previous arrays
+        arrays = self.arrays
+        if (
+            not reusable
+            or arrays is None
+            or selection.changes(self.selection) - {SELECTION_CHANGE}
+            or not selection.matches(arrays)
+        ):
+            self.arrays = self.extract(context, obj)
+            self.extractions += 1
+        else:
+            self.arrays = arrays.with_selection(selection)
+            self.reuses += 1
+        self.selection = selection
+        return self.arrays
+
+    def clear(self):
+        self.arrays = None
+        self.selection = None
+
+    def memory_bytes(self):
+        # arrays shared between the extraction and its selection copies are counted once
+        arrays = dict()
+        for source in (self.arrays, self.selection):
+            if source is not None:
+                arrays.update((id(array), array) for array in vars(source).values() if isinstance(array, np.ndarray))
+        return sum(array.nbytes for array in arrays.values())
@@ -1,33 +1,54 @@
 import os
-import uuid
 import bpy
 import gpu
+import numpy as np
 
+from collections import deque
+from bpy.app.handlers import persistent
 from bpy.types import Operator
-from mathutils import Vector
-from mathutils.geometry import area_tri, normal
-from bpy_extras import mesh_utils
 from gpu_extras.batch import batch_for_shader
 
 from .visualuv_shaders import SHADER_3D, SHADER_2D, SHADER_TEXTURE_2D, SHADER_WIREFRAME
+from .visualuv_scheduler import (
+    refresh,
+    request_refresh,
+    is_own_update,
+    set_property,
+    REFRESH_MODES,
+    take_finished_job,
+    discard_jobs,
+)
+from .visualuv_mesh import (
+    MeshArrays,
+    MeshSelection,
+    MeshSource,
+    GEOMETRY_CHANGE,
+    SELECTION_CHANGE,
+    TRANSFORM_CHANGE,
+)
+from .visualuv_analysis import UVAnalysis
+from .visualuv_parallel import MetricKernels
+from .visualuv_props import get_preferences
+from .visualuv_profile import RefreshProfile, PROFILE_HISTORY
+from .visualuv_overlay import (
+    OverlayData,
+    OverlayJob,
+    OverlaySettings,
+    WIREFRAME_EDGE_COLORS,
+    EMPTY,
+    MEGABYTE,
+)
 
-COLOR_BLUE = 2.0 / 3.0
-COLOR_RED = 1.0
-COLOR_NEGATIVE = -1.0
 HSV_HUE_MULTIPLY_DEFAULT = 1.0
 HSV_HUE_SHIFT_DEFAULT = 0.0
 HSV_SATURATION_DEFAULT = 1.0
 HSV_VALUE_DEFAULT = 0.8
-HSV_MIN_HUE = 0.0
-HSV_MAX_HUE = 1.0
 
 VERTEX_OFFSET = 0.0035
 WIREFRAME_OFFSET_FACE = 0.005
 WIREFRAME_OFFSET = 0.007
 POSITION_OFFSET_DEFAULT = 0.0
 EXPLOSION_OFFSET_DEFAULT = 0.0
-ZERO_VECTOR_3D = Vector()
-ZERO_VECTOR_4D = Vector((0.0, 0.0, 0.0, 0.0))
 
 PLANE_VERTICES = (
             (0,1),(1,1),(0,0),
@@ -37,13 +58,42 @@ PLANE_VERTICES = (
 ENABLED = 1
 DISABLED = 0
 
-EMPTY = 0.0
-
 FILE_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
 IMG_NAME = "__visualuv_checkers.png"
 
-OVERLAY_HANDLERS = dict()
-MODAL_HANDLERS = dict()
+# space type => the one draw handler drawing the overlays of all tracked objects
+DRAW_HANDLERS = dict()
+# tracked object => its overlay, all of them are managed by a single modal operator
+OVERLAYS = dict()
+# (mesh or object, settings key) => overlay shared by the objects using that mesh with those settings
+MESH_OVERLAYS = dict()
+MANAGER_RUNNING = False
+# image session_uid => (image signature, GPU texture), shared by all overlays
+TEXTURE_CACHE = dict()
+
+# object properties the drawn overlay depends on, besides its buffers
+DRAW_PROPERTIES = (
+    'show_3D',
+    'show_2D',
+    'alpha',
+    'overlay_layer',
+    'operation',
+    'checker_texture',
+    'fill_texture',
+    'texture_scale',
+    'texture_alpha',
+    'max_division',
+    'enable_color_change',
+    'hue_shift',
+    'hue_multiply',
+    'saturation',
+    'value',
+    'enable_position_change',
+    'enable_explosion_view',
+    'explosion_offset',
+    'show_wire',
+    'backface_culling',
+)
 
 
 def get_checker_image():
@@ -54,33 +104,241 @@ def get_checker_image():
 
 def check_image_remove():
     idx = bpy.data.images.find(IMG_NAME)
-    if idx != -1 and not MODAL_HANDLERS:
+    if idx != -1 and not OVERLAYS:
         img = bpy.data.images[idx]
+        TEXTURE_CACHE.pop(img.session_uid, None)
         bpy.data.images.remove(img)
 
 
-def create_overlay_3d(draw_function):
-    key_handler_3d = uuid.uuid4()
-    OVERLAY_HANDLERS[key_handler_3d] = bpy.types.SpaceView3D.draw_handler_add(draw_function, (key_handler_3d,), 'WINDOW', 'POST_VIEW')
-
-
-def create_overlay_2d(draw_function):
-    key_handler_2d = uuid.uuid4()
-    OVERLAY_HANDLERS[key_handler_2d] = bpy.types.SpaceImageEditor.draw_handler_add(draw_function, (key_handler_2d,), 'WINDOW', 'POST_VIEW')
-
-
-def remove_overlay_3d(handler_key):
-    handler = OVERLAY_HANDLERS.pop(handler_key, None)
+def get_image_signature(image):
+    # Blender frees the GPU texture of a reloaded, resized or regenerated image, which also resets its bindcode,
+    # the signature is taken after the texture was created, since creating it sets the bindcode
+    return (
+        image.filepath_raw,
+        image.source,
+        tuple(image.size),
+        image.bindcode,
+        image.generated_type,
+        image.generated_width,
+        image.generated_height,
+        tuple(image.generated_color),
+        image.colorspace_settings.name,
+        image.alpha_mode,
+    )
+
+
+def get_image_texture(image):
+    # the texture is only taken from the image again after the image changed
+    cached = TEXTURE_CACHE.get(image.session_uid)
+    if cached is None or cached[0] != get_image_signature(image):
+        texture = gpu.texture.from_image(image)
+        cached = (get_image_signature(image), texture)
+        TEXTURE_CACHE[image.session_uid] = cached
+    return cached[1]
+
+
+def release_unused_textures():
+    # a texture is only kept on the GPU while a tracked overlay draws its image,
+    # removed images are not drawn by any overlay
+    used = set()
+    for obj in OVERLAYS:
+        try:
+            image = obj.visualuv.image
+        except ReferenceError:
+            continue
+        if image is not None:
+            used.add(image.session_uid)
+    for key in TEXTURE_CACHE.keys() - used:
+        del TEXTURE_CACHE[key]
+
+
+def get_flipped_uv_counts(mesh):
+    # returns the number of flipped UV polygons and the number of UV islands containing them,
+    # without building any overlay
+    arrays = MeshArrays(mesh)
+    analysis = UVAnalysis(arrays.vertex_co, arrays.tri_vertices, arrays.tri_loops, arrays.tri_polygons, arrays.loop_uvs, arrays.polygon_count)
+    flipped = analysis.flipped()
+    flipped_islands = np.unique(analysis.island_ids()[flipped])
+    return int(flipped.sum()), len(flipped_islands)
+
+
+def get_theme_colors(theme_colors):
+    return {
+        'vertex_select': np.array((*theme_colors.vertex_select, 1.0), dtype=np.float32),
+        'vertex': np.array((*theme_colors.vertex, 1.0), dtype=np.float32),
+        'face_select': np.array(theme_colors.face_select, dtype=np.float32),
+        'edge_seam': np.array((*theme_colors.edge_seam, 1.0), dtype=np.float32),
+        'edge_select': np.array((*theme_colors.edge_select, 1.0), dtype=np.float32),
+        'edge': np.array((*theme_colors.wire_edit, 1.0), dtype=np.float32),
+    }
+
+
+def get_settings(context, obj):
+    visualuv = obj.visualuv
+    preferences = get_preferences(context)
+    return OverlaySettings(
+        visualuv.operation,
+        visualuv.stretch_type,
+        visualuv.enable_explosion_view,
+        tuple(obj.location),
+        visualuv.show_wire,
+        visualuv.fill_texture,
+        obj.mode,
+        context.tool_settings.use_uv_select_sync,
+        get_theme_colors(context.preferences.themes["Default"].view_3d),
+        MetricKernels(preferences.process_count, preferences.process_threshold),
+        visualuv.memory_budget * MEGABYTE
+    )
+
+
+def create_vertex_buffer(attr_id, length, data):
+    vertex_format = gpu.types.GPUVertFormat()
+    vertex_format.attr_add(id=attr_id, comp_type='F32', len=length, fetch_mode='FLOAT')
+    vbo = gpu.types.GPUVertBuf(vertex_format, len(data))
+    vbo.attr_fill(attr_id, data)
+    return vbo
+
+
+def create_index_buffer(primitive, indices):
+    return gpu.types.GPUIndexBuf(type=primitive, seq=np.ascontiguousarray(indices, dtype=np.int32))
+
+
+def add_draw_handlers():
+    if not DRAW_HANDLERS:
+        DRAW_HANDLERS['VIEW_3D'] = bpy.types.SpaceView3D.draw_handler_add(draw_overlays_3d, (), 'WINDOW', 'POST_VIEW')
+        DRAW_HANDLERS['IMAGE_EDITOR'] = bpy.types.SpaceImageEditor.draw_handler_add(draw_overlays_uv, (), 'WINDOW', 'POST_VIEW')
+
+
+def remove_draw_handlers():
+    handler = DRAW_HANDLERS.pop('VIEW_3D', None)
     if handler:
         bpy.types.SpaceView3D.draw_handler_remove(handler, 'WINDOW')
-
-
-def remove_overlay_2d(handler_key):
-    handler = OVERLAY_HANDLERS.pop(handler_key, None)
+    handler = DRAW_HANDLERS.pop('IMAGE_EDITOR', None)
     if handler:
         bpy.types.SpaceImageEditor.draw_handler_remove(handler, 'WINDOW')
 
 
+def tag_overlay_redraw():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'IMAGE_EDITOR' or area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+def draw_overlays_3d():
+    for overlay in list(OVERLAYS.values()):
+        overlay.draw_overlay()
+
+
+def draw_overlays_uv():
+    if bpy.context.space_data.mode != 'UV':
+        return
+    for overlay in list(OVERLAYS.values()):
+        overlay.draw_overlay_uv()
+
+
+def track_object(context, obj):
+    if obj in OVERLAYS:
+        return
+    overlay = ObjectOverlay(obj)
+    OVERLAYS[obj] = overlay
+    # an object using a mesh which is already tracked draws the existing results
+    shared, created = overlay.attach(context)
+    if created:
+        refresh(shared, context)
+    set_property(obj.visualuv, 'recalculate', False)
+    add_draw_handlers()
+
+
+def untrack_object(obj):
+    overlay = OVERLAYS.pop(obj, None)
+    REFRESH_MODES.pop(obj, None)
+    if overlay is not None:
+        overlay.detach()
+        # the removed overlay has to disappear from every area it was drawn in
+        tag_overlay_redraw()
+    if not OVERLAYS:
+        remove_draw_handlers()
+    release_unused_textures()
+    check_image_remove()
+
+
+def clear_overlays():
+    # the manager finishes on its next event, once it finds no tracked objects
+    global MANAGER_RUNNING
+    for shared in MESH_OVERLAYS.values():
+        discard_jobs(shared)
+    OVERLAYS.clear()
+    MESH_OVERLAYS.clear()
+    REFRESH_MODES.clear()
+    TEXTURE_CACHE.clear()
+    remove_draw_handlers()
+    MANAGER_RUNNING = False
+
+
+@persistent
+def load_pre(*args):
+    # modal operators do not survive loading a file, the next overlay starts a new manager
+    clear_overlays()
+
+
+def get_update_changes(update):
+    changes = set()
+    if update.is_updated_geometry:
+        changes.add(GEOMETRY_CHANGE)
+    if update.is_updated_transform:
+        changes.add(TRANSFORM_CHANGE)
+    # selection is tagged without a geometry update, whether it changed is checked on refresh
+    if not changes:
+        changes.add(SELECTION_CHANGE)
+    return changes
+
+
+@persistent
+def depsgraph_update_post(scene, depsgraph):
+    # edits from operators, scripts, modifiers and drivers all end up as depsgraph updates
+    updated = [(update.id.original, get_update_changes(update)) for update in depsgraph.updates]
+    # objects sharing a mesh are refreshed once, by their shared overlay
+    pending = dict()
+    for obj, overlay in list(OVERLAYS.items()):
+        try:
+            visualuv = obj.visualuv
+            data = obj.data
+        except ReferenceError:
+            continue
+        # writing an add-on property tags the object for a geometry update, an object update which
+        # changed them carries the written properties, settings are refreshed through recalculate
+        properties = overlay.property_state()
+        properties_changed = properties != overlay.seen_properties
+        overlay.seen_properties = properties
+        if is_own_update(obj):
+            continue
+        changes = set()
+        for id_data, update_changes in updated:
+            if id_data == data:
+                changes |= update_changes
+            elif id_data == obj:
+                if properties_changed:
+                    update_changes = update_changes & {TRANSFORM_CHANGE}
+                changes |= update_changes
+        if properties_changed:
+            # display properties only change uniforms
+            overlay.tag_redraw(bpy.context)
+        if not changes or not visualuv.auto_update:
+            continue
+        # the world matrix is a uniform, only the explosion view depends on the object location
+        if changes == {TRANSFORM_CHANGE} and not visualuv.enable_explosion_view:
+            continue
+        shared = overlay.shared
+        if TRANSFORM_CHANGE in changes and visualuv.enable_explosion_view:
+            # the location is part of the shared key in the explosion view
+            shared, _ = overlay.attach(bpy.context)
+        pending[shared] = pending.get(shared, set()) | changes
+    for shared, changes in pending.items():
+        if not is_own_update(shared.obj):
+            request_refresh(shared, changes)
+
+
 class VisualUVOperator():
 
     @classmethod
@@ -105,11 +363,10 @@ class VISUALUV_OT_update(Operator, VisualUVOperator):
             visualuv = obj.visualuv
             if visualuv.enabled:
                 visualuv.recalculate = True
-                if visualuv.operation == 'UV_OVERLAP':
-                    context.window_manager.visualuv.select_overlap = True
-                if not MODAL_HANDLERS.get(obj):
+                if obj not in OVERLAYS:
                     obj.data.update()
-                    bpy.ops.visualuv.overlay('INVOKE_DEFAULT')
+                    track_object(context, obj)
+        bpy.ops.visualuv.overlay('INVOKE_DEFAULT')
         return {'FINISHED'}
 
 class VISUALUV_OT_toggle_texture(Operator, VisualUVOperator):
@@ -179,459 +436,276 @@ class VISUALUV_OT_toggle_normals(Operator, TogglableOperationOperator):
 class VISUALUV_OT_toggle_overlap(Operator, TogglableOperationOperator):
     bl_idname = "visualuv.toggle_overlap"
     bl_label = "Toggle Overlapping UVs overlay"
-    bl_description = "Enable/Disable Overlapping UVs overlay. This operator requires manual refreshing"
+    bl_description = "Enable/Disable Overlapping UVs overlay"
 
     def execute(self, context):
-        for obj in context.selected_objects:
-            visualuv = obj.visualuv
-            if visualuv.operation != 'UV_OVERLAP' and obj.mode == 'EDIT':
-                context.window_manager.visualuv.select_overlap = True
         self.toggle_operation(context, 'UV_OVERLAP')
         return {'FINISHED'}
 
-class VISUALUV_OT_overlay(Operator):
-    bl_idname = "visualuv.overlay"
-    bl_label = "VisualUV overlay operator"
-    bl_description = "Draw VisualUV overlay"
-    bl_options = {'REGISTER', 'INTERNAL'}
-
-    def recalculate_poly_islands(self, mesh):
-        obj = self.invoked_obj
-        visualuv = obj.visualuv
-        islands = mesh_utils.mesh_linked_uv_islands(mesh)
-        color_value = HSV_MIN_HUE
-        island_count = len(islands)
-        if not island_count:
-            return
-        step = HSV_MAX_HUE / island_count
-        object_location = Vector(obj.location)
-        for island in islands:
-            island_center = Vector()
-            color_value += step
-            for polygon_index in island:
-                island_center += Vector(mesh.polygons[polygon_index].center)
-                self.island_colors[polygon_index] = Vector((color_value, 0.0))
-            island_center = island_center / len(island)
-            if not visualuv.enable_explosion_view:
-                continue
-            direction = island_center - object_location
-            if direction == Vector():
-                direction = Vector((0.0, 0.0, 1.0))
-            else:
-                direction = direction.normalized()
-            for polygon_index in island:
-                self.directions[polygon_index] = direction
-
-    def label_overlapped(self, mesh):
-        self.overlapped_polygons = dict()
-        for polygon in mesh.polygons:
-            is_selected = True
-            for loop_index in polygon.loop_indices:
-                if not mesh.uv_layers.active.data[loop_index].select:
-                    is_selected = False
-            if is_selected:
-                self.overlapped_polygons[polygon.index] = True
-
-    def calc_uv_island_colors(self, triangle):
-        color = self.island_colors[triangle.polygon_index]
-        return 3 * [color]
-
-    def recalculate_uv_normals(self, uv_coords):
-            color = COLOR_BLUE if normal(uv_coords).z >= 0.0 else COLOR_RED
-            return 3 * [Vector((color, 0.0))]
-
-    def recalculate_uv_overlap(self, triangle):
-        if self.overlapped_polygons.get(triangle.polygon_index):
-            return 3 * [Vector((COLOR_BLUE, 0.0))]
-        return 3 * [Vector((COLOR_NEGATIVE, 0.0))]
-
-    def recalculate_stretching(self, triangle, triangle_coords, uv_coords):
-            visualuv = self.invoked_obj.visualuv
-            if visualuv.stretch_type == 'ANGLES':
-                return self.recalculate_angle_stretching(triangle, triangle_coords, uv_coords)
-            elif visualuv.stretch_type == 'AREA':
-                return self.recalculate_area_stretching(triangle, triangle_coords, uv_coords)
-            else:
-                return self.recalculate_edge_length_stretching(triangle, triangle_coords, uv_coords)
-
-    def recalculate_area_stretching(self, triangle, triangle_coords, uv_coords):
-            triangle_directions = [(v1 - v0) for v0, v1 in zip(triangle_coords, triangle_coords[1:] + triangle_coords[0:1])]
-            triangle_directions_normalized = [v.normalized() for v in triangle_directions]
-            triangle_sides = Vector(v.length for v in triangle_directions).normalized()
-            uv_directions = [(v1 - v0) for v0, v1 in zip(uv_coords, uv_coords[1:] + uv_coords[0:1])]
-            uv_directions_normalized = [v.normalized() for v in uv_directions]
-            uv_sides = Vector(v.length for v in uv_directions).normalized()
-
-            normalized_uv_coords = []
-            normalized_triangle_coords = []
-            uv_co = Vector()
-            tri_co = Vector()
-            for i, _ in enumerate(triangle.vertices):
-                uv_co += uv_sides[i] * uv_directions_normalized[i]
-                tri_co += triangle_sides[i] * uv_directions_normalized[i]
-                normalized_uv_coords.append(uv_co.copy())
-                normalized_triangle_coords.append(tri_co.copy())            
-
-            triangle_area = area_tri(*normalized_triangle_coords)
-            uv_area = area_tri(*normalized_uv_coords)
-            key = triangle.polygon_index
-
-            if self.areas.get(key):
-                area_input = self.areas.get(key)
-                area_input.x += triangle_area
-                area_input.y += uv_area
-            else:
-                area_input = Vector((triangle_area, uv_area))
-                self.areas[key] = area_input
-            return 3 * [area_input]
-
-    def recalculate_edge_length_stretching(self, triangle, triangle_coords, uv_coords):
-            triangle_vec = Vector((v1 - v0).length for v0, v1 in zip(triangle_coords, triangle_coords[1:] + triangle_coords[0:1])).normalized()
-            uv_vec = Vector((v1 - v0).length for v0, v1 in zip(uv_coords, uv_coords[1:] + uv_coords[0:1])).normalized()
-
-            key = triangle.polygon_index
-            length_input = self.total_lengths.get(key)
-            if not length_input:
-                length_input = Vector((0.0, 1.0))
-            for length, uv_length in zip(triangle_vec, uv_vec):
-                if (length == 0.0 or uv_length == 0.0):
-                    division = 0.0
-                else:
-                    division = length / uv_length if length > uv_length else uv_length / length
-                length_input.x = (length_input.x + division) / 2.0
-            self.total_lengths[key] = length_input
-            return 3 * [length_input]
-
-    def recalculate_angle_stretching(self, triangle, triangle_coords, uv_coords):
-            tri_angles = self.get_angles(*triangle_coords)
-            uv_angles = self.get_angles(*uv_coords)
-
-            output = []
-            for i, vert_index in enumerate(triangle.vertices):
-                tri_angle = tri_angles[i]
-                uv_angle = uv_angles[i]
-                key = (vert_index, triangle.polygon_index)
-                if self.angles.get(key):
-                    angle_input = self.angles.get(key)
-                    angle_input.x += tri_angle
-                    angle_input.y += uv_angle
-                else:
-                    angle_input = Vector((tri_angle, uv_angle))
-                    self.angles[key] = angle_input
-                output.append(angle_input)
-            return output
-
-    def get_angles(self, vert1: Vector, vert2: Vector, vert3: Vector):
-        edge1 = vert2 - vert1
-        edge2 = vert3 - vert1
-        angle1 = 0.0 if edge1.length == 0.0 or edge2.length == 0.0 else edge1.angle(edge2)
-
-        edge1 = vert3 - vert2
-        edge2 = vert1 - vert2
-        angle2 = 0.0 if edge1.length == 0.0 or edge2.length == 0.0 else edge1.angle(edge2)
-
-        edge1 = vert1 - vert3
-        edge2 = vert2 - vert3
-        angle3 = 0.0 if edge1.length == 0.0 or edge2.length == 0.0 else edge1.angle(edge2)
-
-        return angle1, angle2, angle3
-
-    def recalc_triangle_input(self, obj, mesh, triangle, triangle_coords, uv_coords):
-        visualuv = obj.visualuv
-        if visualuv.operation == 'UV_ISLANDS':
-            return self.calc_uv_island_colors(triangle)
-        elif visualuv.operation == 'UV_STRETCHING':
-            return self.recalculate_stretching(triangle, triangle_coords, uv_coords)
-        elif visualuv.operation == 'UV_NORMALS':
-            return self.recalculate_uv_normals(uv_coords)
-        elif visualuv.operation == 'UV_OVERLAP' and self.invoked_obj.mode == 'EDIT':
-            return self.recalculate_uv_overlap(triangle)
-        return 3 * [Vector((COLOR_NEGATIVE, EMPTY))]
-
-    def clear_properties(self):
-        self.directions = dict()
-        self.areas = dict()
-        self.angles = dict()
-        self.total_lengths = dict()
-        self.island_colors = dict()
-        
-        self.verts = []
-        self.normals = []
-        self.uvs = []
-        self.vert_directions = []
-        self.input = []
-        self.uv_colors = []
-        self.tex_coords = []
-
-        self.wireframe_coords = []
-        self.wireframe_normals = []
-        self.wireframe_directions = []
-
-        self.wireframe_vertex_colors = []
-        self.wireframe_edge_colors = []
-        self.wireframe_face_colors = []
-        self.wireframe_seam_colors = []
-
-    def recalculate_info(self, context, obj):
-        visited_edges = dict()
-        self.clear_properties()
-
-        if context.window_manager.visualuv.select_overlap and obj.mode == 'EDIT':
-            context.window_manager.visualuv.select_overlap = False
-            if not bpy.context.tool_settings.use_uv_select_sync:
-                bpy.ops.uv.select_overlap()
-                for selected_obj in context.selected_objects:
-                    selected_obj.visualuv.overlap_recalculate = True
-
-        obj.update_from_editmode()
-        depsgraph = context.evaluated_depsgraph_get()
-        # this new object might differ from the original, but we only need it for the mesh
-        obj = obj.evaluated_get(depsgraph)
-        mesh = obj.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
-        # we need the object for its properties, let's revert to the original
-        obj = self.invoked_obj
-        visualuv = obj.visualuv
-        visualuv.recalculate = False
-        uv_map_name = mesh.uv_layers.active.name
-        active_uv_map = mesh.attributes[uv_map_name].data
-        theme_colors = context.preferences.themes["Default"].view_3d
-
-        if visualuv.overlap_recalculate:
-            self.label_overlapped(mesh)
-            visualuv.overlap_recalculate = False
-
-        if visualuv.operation == 'UV_ISLANDS' or visualuv.enable_explosion_view:
-            self.recalculate_poly_islands(mesh)
-
-        mesh.calc_loop_triangles()
-
-        verts = 3 * [ZERO_VECTOR_3D]
-        normals = 3 * [ZERO_VECTOR_3D]
-        vert_directions = 3 * [ZERO_VECTOR_3D]
-        uv_coords = 3 * [ZERO_VECTOR_3D]
-        
-        wireframe_face_colors = 3 * [ZERO_VECTOR_4D]
-        wireframe_coords = 6 * [ZERO_VECTOR_3D]
-        wireframe_normals = 6 * [ZERO_VECTOR_3D]
-        wireframe_directions  = 6 * [ZERO_VECTOR_3D]
-        wireframe_seam_colors  = 6 * [ZERO_VECTOR_4D]
-        wireframe_edge_colors  = 6 * [ZERO_VECTOR_4D]
-        wireframe_vertex_colors  = 6 * [ZERO_VECTOR_4D]
-
-        color_vertex_select = (*theme_colors.vertex_select, 1.0)
-        color_vertex = (*theme_colors.vertex, 1.0)
-        color_face_selected = theme_colors.face_select
-        color_transparent = ZERO_VECTOR_4D
-        color_edge_seam = (*theme_colors.edge_seam, 1.0)
-        color_edge_select = (*theme_colors.edge_select, 1.0)
-        color_edge = (*theme_colors.wire_edit, 1.0)
-
-        for _, triangle in enumerate(mesh.loop_triangles):
-            polygon = mesh.polygons[triangle.polygon_index]
-            if polygon.hide:
-                continue
-
-            if visualuv.enable_explosion_view:
-                direction = self.directions[polygon.index][:]
-            else:
-                direction = ZERO_VECTOR_3D
-
-            for i, loop_index in enumerate(triangle.loops):
-                
-                vertex = mesh.vertices[triangle.vertices[i]]
-                verts[i] = vertex.co
-                normals[i] = vertex.normal
-                vert_directions[i] = direction
-                # we must keep a copy of UV coordinates, Blender generaly does not keep UV references
-                uv_coords[i] = Vector((*(active_uv_map[loop_index].vector), 0.0))
-
-                wireframe_face_colors[i] = color_face_selected if polygon.select else color_transparent
-                
-                if (visualuv.show_wire and obj.mode == 'EDIT'):
-                    
-                    # calculate wireframe
-                    loop = mesh.loops[loop_index]
-                    edge = mesh.edges[loop.edge_index]
-                    if not visited_edges.get(loop.edge_index):
-                        visited_edges[loop.edge_index] = True
-                        for j, vert_index in enumerate(edge.vertices):
-                            vertex = mesh.vertices[vert_index]
-                            array_index = (i * 2) + j
-                            wireframe_coords[array_index] = vertex.co
-                            wireframe_normals[array_index] = vertex.normal
-                            wireframe_directions[array_index] = direction
-
-                            wireframe_vertex_colors[array_index] = color_vertex_select if vertex.select else color_vertex
-                            wireframe_seam_colors[array_index] = color_edge_seam if edge.use_seam else color_transparent
-                            wireframe_edge_colors[array_index] = color_edge_select if edge.select else color_edge
-
-            self.wireframe_vertex_colors.extend(wireframe_vertex_colors)
-            self.wireframe_edge_colors.extend(wireframe_edge_colors)
-            self.wireframe_seam_colors.extend(wireframe_seam_colors)
-            self.wireframe_face_colors.extend(wireframe_face_colors)
-
-            self.wireframe_coords.extend(wireframe_coords)
-            self.wireframe_normals.extend(wireframe_normals)
-            self.wireframe_directions.extend(wireframe_directions)
-
-            self.verts.extend(verts)
-            self.normals.extend(normals)
-            self.vert_directions.extend(vert_directions)
-
-            # get info for the 3D Vieport shader
-            triangle_input = self.recalc_triangle_input(obj, mesh, triangle, verts, uv_coords)
-
-            self.input.extend(triangle_input)
-            self.tex_coords.extend(uv_coords)
-
-            if polygon.select or bpy.context.tool_settings.use_uv_select_sync:
-                self.uv_colors.extend(triangle_input)
-                self.uvs.extend(uv_coords)
-
-        self.prepare_shader_batches(obj)
-
-    def prepare_shader_batches(self, obj):
+class MeshOverlay():
+
+    # results and GPU buffers of one mesh, shared by all tracked objects which use the same mesh
+    # datablock with the same settings, the first of them is refreshed for all
+    def __init__(self, key, obj):
+        self.key = key
+        self.obj = obj
+        self.users = []
+        self.vertex_buffers = dict()
+        self.index_buffers = dict()
+        self.data = OverlayData()
+        self.job = None
+        self.source = MeshSource()
+        self.buffer_bytes = None
+        # stages of the latest refreshes, newest last
+        self.profiles = deque(maxlen=PROFILE_HISTORY)
+        # bumped by every finished refresh
+        self.version = 0
+
+    def recalculate_info(self, context, obj, changes=None):
+        # only the snapshot is taken on the main thread, the overlay is computed by the worker
         visualuv = obj.visualuv
-        uv_vertices = self.uvs if not visualuv.fill_texture else PLANE_VERTICES
+        profile = RefreshProfile(obj.name, bpy.path.abspath(visualuv.timing_log_path) if visualuv.timing_log else None)
+        with profile.stage('update_from_editmode'):
+            obj.update_from_editmode()
+        set_property(visualuv, 'recalculate', False)
+        settings = get_settings(context, obj)
+        with profile.stage('selection'):
+            selection = MeshSelection(obj.data)
+        # modifiers and drivers change the evaluated mesh only, the depsgraph reports that as a geometry change,
+        # settings like the object mode can change the evaluated mesh as well
+        previous = self.job
+        reusable = changes is not None and GEOMETRY_CHANGE not in changes
+        reusable = reusable and previous is not None and settings.layout_key() == previous.settings.layout_key()
+        with profile.stage('extraction') as stage:
+            arrays = self.source.get_arrays(context, obj, selection, reusable)
+            stage.triangles = len(arrays.tri_loops)
+        profile.triangles = len(arrays.tri_loops)
+        self.job = OverlayJob(arrays, settings, profile)
+        return self.job
+
+    def metric_switched(self, context, obj):
+        # only the shown metric differs from the last refresh, so the mesh snapshot is still valid
+        previous = self.job
+        if previous is None:
+            return False
+        settings = get_settings(context, obj)
+        return settings.metric() != previous.settings.metric() and settings.layout_key() == previous.settings.layout_key()
+
+    def add_profile(self, profile):
+        self.profiles.append(profile)
+        profile.write_log()
+
+    def swap_buffers(self):
+        # buffers of a finished refresh replace the drawn ones right before drawing
+        buffers = take_finished_job(self)
+        if buffers is not None:
+            profile = buffers.profile
+            with profile.stage('upload') as stage:
+                self.prepare_shader_batches(buffers)
+                stage.buffer_bytes = buffers.upload_bytes()
+            profile.write_log(profile.stages[-1:])
+        return hasattr(self, 'batch_3d')
+
+    def tag_redraw(self, context):
+        for user in self.users:
+            user.tag_redraw(context)
+
+    def prepare_shader_batches(self, buffers):
+        vbos = self.vertex_buffers
+        ibos = self.index_buffers
+
+        # only the buffers whose data changed are uploaded again, the rest is reused
+        for name, (attr_id, length, data) in buffers.vertex_data.items():
+            vbos[name] = create_vertex_buffer(attr_id, length, data)
+        for name, (primitive, indices) in buffers.index_data.items():
+            ibos[name] = create_index_buffer(primitive, indices)
+        self.buffer_bytes = buffers.buffer_bytes
 
         # batch UV Editor
-        
-        self.batch_texture = batch_for_shader(
-            SHADER_TEXTURE_2D,
-            'TRIS',
-            {
-                "position": uv_vertices
-            }
-        )
+        if buffers.settings.fill_texture:
+            self.batch_texture = batch_for_shader(SHADER_TEXTURE_2D, 'TRIS', {"position": PLANE_VERTICES})
+        else:
+            self.batch_texture = gpu.types.GPUBatch(type='TRIS', buf=vbos['uv_positions'], elem=ibos['uv_triangles'])
+
+        self.batch_2d = gpu.types.GPUBatch(type='TRIS', buf=vbos['uv_positions'], elem=ibos['uv_triangles'])
+        self.batch_2d.vertbuf_add(vbos['input'])
+
+        self.batch_3d = gpu.types.GPUBatch(type='TRIS', buf=vbos['verts'], elem=ibos['triangles'])
+        self.batch_3d.vertbuf_add(vbos['normals'])
+        self.batch_3d.vertbuf_add(vbos['input'])
+        self.batch_3d.vertbuf_add(vbos['vert_directions'])
+        self.batch_3d.vertbuf_add(vbos['tex_coords'])
+
+        # batch wireframe faces, only the selected ones are highlighted
+        self.batch_wireframe_face = gpu.types.GPUBatch(type='TRIS', buf=vbos['verts'], elem=ibos['face_triangles'])
+        self.batch_wireframe_face.vertbuf_add(vbos['normals'])
+        self.batch_wireframe_face.vertbuf_add(vbos['vert_directions'])
+        self.batch_wireframe_face.vertbuf_add(vbos['face_colors'])
+
+        # batch wireframe vertices, every point is drawn once
+        self.batch_wireframe_vertex = gpu.types.GPUBatch(type='POINTS', buf=vbos['wireframe_coords'])
+        self.batch_wireframe_vertex.vertbuf_add(vbos['wireframe_normals'])
+        self.batch_wireframe_vertex.vertbuf_add(vbos['wireframe_directions'])
+        self.batch_wireframe_vertex.vertbuf_add(vbos['wireframe_vertex_colors'])
+
+        self.batch_wireframe_vertex_lines = gpu.types.GPUBatch(type='LINES', buf=vbos['wireframe_coords'], elem=ibos['edges'])
+        self.batch_wireframe_vertex_lines.vertbuf_add(vbos['wireframe_normals'])
+        self.batch_wireframe_vertex_lines.vertbuf_add(vbos['wireframe_directions'])
+        self.batch_wireframe_vertex_lines.vertbuf_add(vbos['wireframe_vertex_colors'])
+
+        # batch wireframe edges, seams and selected edges
+        for name in WIREFRAME_EDGE_COLORS:
+            batch = gpu.types.GPUBatch(type='LINES', buf=vbos['wireframe_coords'], elem=ibos[name])
+            batch.vertbuf_add(vbos['wireframe_normals'])
+            batch.vertbuf_add(vbos['wireframe_directions'])
+            batch.vertbuf_add(vbos[name + '_colors'])
+            setattr(self, 'batch_wireframe_' + name, batch)
+
+
+
+class ObjectOverlay():
+
+    # per-object state of a tracked object, its uniforms and redraws, the buffers are shared
+    def __init__(self, obj):
+        self.obj = obj
+        self.shared = None
+        self.uniform_buffers = dict()
+        # bumped whenever the drawn overlay changes, areas are only tagged for a redraw when it moved
+        self.version = 0
+        self.tagged_version = None
+        self.drawn_state = None
+        self.seen_properties = self.property_state()
+        self.check_image_exists()
 
-        self.batch_2d = batch_for_shader(
-            SHADER_2D,
-            'TRIS',
-            {
-                "position": self.uvs,
-                "input": self.uv_colors
-            }
+    def shared_key(self, context):
+        # evaluated meshes of objects with modifiers or shape keys differ, they are never shared
+        obj = self.obj
+        mesh = obj.data if MeshSource.uses_original(obj) else obj
+        return (mesh, get_settings(context, obj).key())
+
+    def attach(self, context):
+        # returns the shared overlay of the object and whether its results have to be computed
+        key = self.shared_key(context)
+        shared = self.shared
+        if shared is not None and shared.key == key:
+            return shared, True
+        # an overlay used by this object only follows its settings, keeping the inputs of the metrics shown before
+        if shared is not None and shared.users == [self] and key not in MESH_OVERLAYS:
+            MESH_OVERLAYS.pop(shared.key, None)
+            shared.key = key
+            MESH_OVERLAYS[key] = shared
+            self.version += 1
+            return shared, True
+        self.detach()
+        shared = MESH_OVERLAYS.get(key)
+        created = shared is None
+        if created:
+            shared = MESH_OVERLAYS[key] = MeshOverlay(key, self.obj)
+        shared.users.append(self)
+        self.shared = shared
+        self.version += 1
+        return shared, created
+
+    def detach(self):
+        shared = self.shared
+        self.shared = None
+        if shared is None:
+            return
+        shared.users.remove(self)
+        if not shared.users:
+            MESH_OVERLAYS.pop(shared.key, None)
+            discard_jobs(shared)
+        elif shared.obj == self.obj:
+            shared.obj = shared.users[0].obj
+
+    def draw_state(self, context):
+        obj = self.obj
+        visualuv = obj.visualuv
+        return (
+            tuple(getattr(visualuv, name) for name in DRAW_PROPERTIES),
+            tuple(visualuv.location_offset),
+            visualuv.image.session_uid if visualuv.image else None,
+            tuple(tuple(row) for row in obj.matrix_world),
+            obj.mode,
+            obj.select_get(),
+            obj == context.object,
+            context.tool_settings.mesh_select_mode[0],
         )
 
-        # prepare mesh buffers
-        mesh_buffer_size = len(self.verts)
-
-        verts_format = gpu.types.GPUVertFormat()
-        verts_format.attr_add(id="position", comp_type='F32', len=3, fetch_mode='FLOAT')
-        verts_vbo = gpu.types.GPUVertBuf(verts_format, mesh_buffer_size)
-        verts_vbo.attr_fill("position", self.verts)
-
-        normals_format = gpu.types.GPUVertFormat()
-        normals_format.attr_add(id="normal", comp_type='F32', len=3, fetch_mode='FLOAT')
-        normals_vbo = gpu.types.GPUVertBuf(normals_format, mesh_buffer_size)
-        normals_vbo.attr_fill("normal", self.normals)
-
-        inputs_format = gpu.types.GPUVertFormat()
-        inputs_format.attr_add(id="input", comp_type='F32', len=2, fetch_mode='FLOAT')
-        inputs_vbo = gpu.types.GPUVertBuf(inputs_format, mesh_buffer_size)
-        inputs_vbo.attr_fill("input", self.input)
-
-        directions_format = gpu.types.GPUVertFormat()
-        directions_format.attr_add(id="direction", comp_type='F32', len=3, fetch_mode='FLOAT')
-        directions_vbo = gpu.types.GPUVertBuf(directions_format, mesh_buffer_size)
-        directions_vbo.attr_fill("direction", self.vert_directions)
-
-        uvs_format = gpu.types.GPUVertFormat()
-        uvs_format.attr_add(id="uv", comp_type='F32', len=3, fetch_mode='FLOAT')
-        uvs_vbo = gpu.types.GPUVertBuf(uvs_format, mesh_buffer_size)
-        uvs_vbo.attr_fill("uv", self.tex_coords)
-
-        self.batch_3d = gpu.types.GPUBatch(type='TRIS', buf=verts_vbo)
-        self.batch_3d.vertbuf_add(normals_vbo)
-        self.batch_3d.vertbuf_add(inputs_vbo)
-        self.batch_3d.vertbuf_add(directions_vbo)
-        self.batch_3d.vertbuf_add(uvs_vbo)
-        
-        # prepare wireframe buffers
-        wireframe_buffer_size = len(self.wireframe_coords)
-
-        wireframe_color_format = gpu.types.GPUVertFormat()
-        wireframe_color_format.attr_add(id="color", comp_type='F32', len=4, fetch_mode='FLOAT')
-        wireframe_vertex_colors_vbo = gpu.types.GPUVertBuf(wireframe_color_format, wireframe_buffer_size)
-        wireframe_vertex_colors_vbo.attr_fill("color", self.wireframe_vertex_colors)
-
-        wireframe_edge_colors_vbo = gpu.types.GPUVertBuf(wireframe_color_format, wireframe_buffer_size)
-        wireframe_edge_colors_vbo.attr_fill("color", self.wireframe_edge_colors)
-
-        wireframe_seam_colors_vbo = gpu.types.GPUVertBuf(wireframe_color_format, wireframe_buffer_size)
-        wireframe_seam_colors_vbo.attr_fill("color", self.wireframe_seam_colors)
-
-        wireframe_coords_format = gpu.types.GPUVertFormat()
-        wireframe_coords_format.attr_add(id="position", comp_type='F32', len=3, fetch_mode='FLOAT')
-        wireframe_coords_vbo = gpu.types.GPUVertBuf(wireframe_coords_format, wireframe_buffer_size)
-        wireframe_coords_vbo.attr_fill("position", self.wireframe_coords)
-
-        wireframe_normals_format = gpu.types.GPUVertFormat()
-        wireframe_normals_format.attr_add(id="normal", comp_type='F32', len=3, fetch_mode='FLOAT')
-        wireframe_normals_vbo = gpu.types.GPUVertBuf(wireframe_normals_format, wireframe_buffer_size)
-        wireframe_normals_vbo.attr_fill("normal", self.wireframe_normals)
-
-        wireframe_directions_format = gpu.types.GPUVertFormat()
-        wireframe_directions_format.attr_add(id="direction", comp_type='F32', len=3, fetch_mode='FLOAT')
-        wireframe_directions_vbo = gpu.types.GPUVertBuf(wireframe_directions_format, wireframe_buffer_size)
-        wireframe_directions_vbo.attr_fill("direction", self.wireframe_directions)
-
-        wireframe_face_color_format = gpu.types.GPUVertFormat()
-        wireframe_face_color_format.attr_add(id="color", comp_type='F32', len=4, fetch_mode='FLOAT')
-        wireframe_face_colors_colors_vbo = gpu.types.GPUVertBuf(wireframe_face_color_format, mesh_buffer_size)
-        wireframe_face_colors_colors_vbo.attr_fill("color", self.wireframe_face_colors)
-
-        # batch wireframe faces
-        self.batch_wireframe_face = gpu.types.GPUBatch(type='TRIS', buf=verts_vbo)
-        self.batch_wireframe_face.vertbuf_add(normals_vbo)
-        self.batch_wireframe_face.vertbuf_add(directions_vbo)
-        self.batch_wireframe_face.vertbuf_add(wireframe_face_colors_colors_vbo)
-
-        # batch wireframe vertices 
-        self.batch_wireframe_vertex = gpu.types.GPUBatch(type='POINTS', buf=wireframe_coords_vbo)
-        self.batch_wireframe_vertex.vertbuf_add(wireframe_normals_vbo)
-        self.batch_wireframe_vertex.vertbuf_add(wireframe_directions_vbo)
-        self.batch_wireframe_vertex.vertbuf_add(wireframe_vertex_colors_vbo)
-        
-        self.batch_wireframe_vertex_lines = gpu.types.GPUBatch(type='LINES', buf=wireframe_coords_vbo)
-        self.batch_wireframe_vertex_lines.vertbuf_add(wireframe_normals_vbo)
-        self.batch_wireframe_vertex_lines.vertbuf_add(wireframe_directions_vbo)
-        self.batch_wireframe_vertex_lines.vertbuf_add(wireframe_vertex_colors_vbo)
-
-        # batch wireframe edges 
-        self.batch_wireframe_edge = gpu.types.GPUBatch(type='LINES', buf=wireframe_coords_vbo)
-        self.batch_wireframe_edge.vertbuf_add(wireframe_normals_vbo)
-        self.batch_wireframe_edge.vertbuf_add(wireframe_directions_vbo)
-        self.batch_wireframe_edge.vertbuf_add(wireframe_edge_colors_vbo)
-
-        # batch wireframe seams
-        self.batch_wireframe_seam = gpu.types.GPUBatch(type='LINES', buf=wireframe_coords_vbo)
-        self.batch_wireframe_seam.vertbuf_add(wireframe_normals_vbo)
-        self.batch_wireframe_seam.vertbuf_add(wireframe_directions_vbo)
-        self.batch_wireframe_seam.vertbuf_add(wireframe_seam_colors_vbo)
-
-    def draw_overlay_uv(self, handler_key):
-        context = bpy.context
+    def property_state(self):
+        # every add-on property of the object, images by their session uid
+        visualuv = self.obj.visualuv
+        state = []
+        for prop in visualuv.bl_rna.properties:
+            if prop.identifier == 'rna_type':
+                continue
+            value = getattr(visualuv, prop.identifier)
+            if prop.type == 'POINTER':
+                value = value.session_uid if value else None
+            elif getattr(prop, 'is_array', False):
+                value = tuple(value)
+            state.append(value)
+        return tuple(state)
+
+    def shows_in(self, area):
+        space = area.spaces.active
+        if area.type == 'VIEW_3D':
+            return space.local_view is None or self.obj.local_view_get(space)
+        if area.type == 'IMAGE_EDITOR':
+            return space.mode == 'UV'
+        return False
+
+    def tag_redraw(self, context):
+        # properties and transforms only change uniforms, they move the version as well
+        state = self.draw_state(context)
+        if state != self.drawn_state:
+            self.drawn_state = state
+            self.version += 1
+        version = (self.version, self.shared.version)
+        if version == self.tagged_version:
+            return
+        self.tagged_version = version
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:
+                if self.shows_in(area):
+                    area.tag_redraw()
+
+    def get_uniform_buffer(self, name, args):
+        # the overlay properties rarely change between redraws, so every uniform block keeps its
+        # buffer and only uploads the packed values again when they differ from the last upload
+        uniform = self.uniform_buffers.get(name)
+        if uniform is None:
+            ubo = gpu.types.GPUUniformBuf(gpu.types.Buffer('FLOAT', len(args), args))
+            self.uniform_buffers[name] = [args, ubo]
+            return ubo
+        if uniform[0] != args:
+            uniform[1].update(gpu.types.Buffer('FLOAT', len(args), args))
+            uniform[0] = args
+        return uniform[1]
+
+    def draw_overlay_uv(self):
+        # disabled and removed objects are untracked by the manager on its next event
         try:
-            obj = self.invoked_obj
+            obj = self.obj
             visualuv = obj.visualuv
             if not visualuv.enabled:
-                remove_overlay_2d(handler_key)
                 return
         except ReferenceError:
-            remove_overlay_2d(handler_key)
             return
 
-        if context.space_data.mode != 'UV':
-            return
         if not visualuv.show_2D:
             return
         if not obj.select_get():
             return
         if obj.mode != 'EDIT':
             return
+        if not visualuv.image:
+            return
+        shared = self.shared
+        if not shared.swap_buffers():
+            return
 
-        texture = gpu.texture.from_image(visualuv.image)
+        texture = get_image_texture(visualuv.image)
         # Prepare texture shader for drawing
         # Create float buffer with padding => final size has to be multiple of vec4
         args = (
@@ -641,15 +715,13 @@ class VISUALUV_OT_overlay(Operator):
             EMPTY
         )
 
-        buf_tex2d = gpu.types.Buffer('FLOAT', len(args), args)
-        ubo_tex2d = gpu.types.GPUUniformBuf(buf_tex2d)
-        SHADER_TEXTURE_2D.uniform_block("ubo_tex2d", ubo_tex2d)
+        SHADER_TEXTURE_2D.uniform_block("ubo_tex2d", self.get_uniform_buffer('tex2d', args))
         SHADER_TEXTURE_2D.uniform_sampler("image", texture)
 
         if visualuv.checker_texture and obj is bpy.context.object:
             gpu.state.depth_test_set('LESS_EQUAL')
             gpu.state.blend_set('ALPHA')
-            self.batch_texture.draw(SHADER_TEXTURE_2D)
+            shared.batch_texture.draw(SHADER_TEXTURE_2D)
 
         gpu.state.depth_test_set('NONE')
         gpu.state.blend_set('NONE')
@@ -674,33 +746,36 @@ class VISUALUV_OT_overlay(Operator):
             EMPTY, EMPTY, EMPTY, EMPTY, EMPTY
         )
 
-        buf_color = gpu.types.Buffer('FLOAT', len(args), args)
-        ubo_color = gpu.types.GPUUniformBuf(buf_color)
-        SHADER_2D.uniform_block("ubo_color", ubo_color) 
-        self.batch_2d.draw(SHADER_2D)
+        SHADER_2D.uniform_block("ubo_color", self.get_uniform_buffer('color', args))
+        shared.batch_2d.draw(SHADER_2D)
 
         gpu.state.depth_test_set('NONE')
         gpu.state.blend_set('NONE')
 
-    def draw_overlay(self, handler_key): 
+    def draw_overlay(self):
         try:
-            obj = self.invoked_obj
+            obj = self.obj
             visualuv = obj.visualuv
             if not visualuv.enabled:
-                remove_overlay_3d(handler_key)
                 return
         except ReferenceError:
-            remove_overlay_3d(handler_key)
             return
         
         if not visualuv.show_3D:
             return
+        if not self.shows_in(bpy.context.area):
+            return
+        if not visualuv.image:
+            return
+        shared = self.shared
+        if not shared.swap_buffers():
+            return
         if visualuv.backface_culling:
             gpu.state.face_culling_set('BACK') 
         gpu.state.depth_test_set('LESS_EQUAL')
         gpu.state.blend_set('NONE')
 
-        texture = gpu.texture.from_image(visualuv.image)
+        texture = get_image_texture(visualuv.image)
         # Prepare 3D shader for drawing
         SHADER_3D.uniform_float("viewProjectionMatrix", bpy.context.region_data.perspective_matrix)
         SHADER_3D.uniform_float("worldMatrix", obj.matrix_world)
@@ -730,11 +805,9 @@ class VISUALUV_OT_overlay(Operator):
             max_division, EMPTY, EMPTY
         )
 
-        buf_3d = gpu.types.Buffer('FLOAT', len(args), args)
-        ubo_3d = gpu.types.GPUUniformBuf(buf_3d)
-        SHADER_3D.uniform_block("ubo_3d", ubo_3d)
+        SHADER_3D.uniform_block("ubo_3d", self.get_uniform_buffer('3d', args))
         SHADER_3D.uniform_sampler("image", texture)
-        self.batch_3d.draw(SHADER_3D)
+        shared.batch_3d.draw(SHADER_3D)
 
 
         # # Prepare wireframe shader for drawing
@@ -751,12 +824,10 @@ class VISUALUV_OT_overlay(Operator):
                 WIREFRAME_OFFSET, EMPTY, EMPTY, EMPTY
             )
 
-            buf_wire = gpu.types.Buffer('FLOAT', len(wireframe_args), wireframe_args)
-            ubo_wire = gpu.types.GPUUniformBuf(buf_wire)
-            SHADER_WIREFRAME.uniform_block("ubo_wire", ubo_wire)
+            SHADER_WIREFRAME.uniform_block("ubo_wire", self.get_uniform_buffer('wire', wireframe_args))
 
             gpu.state.line_width_set(6)
-            self.batch_wireframe_seam.draw(SHADER_WIREFRAME)
+            shared.batch_wireframe_seam.draw(SHADER_WIREFRAME)
             gpu.state.line_width_set(4)
 
             # Create float buffer with padding => final size has to be multiple of vec4
@@ -766,22 +837,21 @@ class VISUALUV_OT_overlay(Operator):
                 WIREFRAME_OFFSET_FACE, EMPTY, EMPTY, EMPTY
             )
 
-            buf_wire = gpu.types.Buffer('FLOAT', len(wireframe_args), wireframe_args)
-            ubo_wire = gpu.types.GPUUniformBuf(buf_wire)
-            SHADER_WIREFRAME.uniform_block("ubo_wire", ubo_wire)
+            SHADER_WIREFRAME.uniform_block("ubo_wire", self.get_uniform_buffer('wire_face', wireframe_args))
 
-            self.batch_wireframe_face.draw(SHADER_WIREFRAME)
+            shared.batch_wireframe_face.draw(SHADER_WIREFRAME)
             gpu.state.line_width_set(1)
 
             #  wireframe edges are visibile all the time if wirefrime is enabled
-            self.batch_wireframe_edge.draw(SHADER_WIREFRAME)     
+            shared.batch_wireframe_edge.draw(SHADER_WIREFRAME)
+            shared.batch_wireframe_edge_select.draw(SHADER_WIREFRAME)
 
             # draws wireframe vertices only if vertex selection mode is enabled
             vertex_select_mode = bpy.context.tool_settings.mesh_select_mode[0]
             if vertex_select_mode:
                 gpu.state.point_size_set(4)
-                self.batch_wireframe_vertex.draw(SHADER_WIREFRAME)
-                self.batch_wireframe_vertex_lines.draw(SHADER_WIREFRAME)      
+                shared.batch_wireframe_vertex.draw(SHADER_WIREFRAME)
+                shared.batch_wireframe_vertex_lines.draw(SHADER_WIREFRAME)      
 
         gpu.state.point_size_set(1)
         gpu.state.line_width_set(1)
@@ -791,44 +861,68 @@ class VISUALUV_OT_overlay(Operator):
         if visualuv.backface_culling:
             gpu.state.face_culling_set('NONE')
 
-    def modal(self, context, event):
-        try:
-            obj = self.invoked_obj
-            visualuv = obj.visualuv
-            if not visualuv.enabled:
-                MODAL_HANDLERS.pop(obj, None)
-                check_image_remove()
-                return {'FINISHED'}
-        except ReferenceError:
-            MODAL_HANDLERS.pop(obj, None)
-            check_image_remove()
-            return {'FINISHED'}
+    def check_image_exists(self):
+        visualuv = self.obj.visualuv
+        if not visualuv.image:
+            visualuv.image = get_checker_image()
 
-        for area in bpy.context.screen.areas :
-            if area.type == 'IMAGE_EDITOR' or area.type == 'VIEW_3D':
-                area.tag_redraw()
 
-        self.check_image_exists()
-        if visualuv.auto_update and event.value in ('RELEASE', 'CLICK') and event.value_prev not in ('RELEASE', 'CLICK'):
-            visualuv.recalculate = True
-            return {'PASS_THROUGH'}
+class VISUALUV_OT_overlay(Operator):
+    bl_idname = "visualuv.overlay"
+    bl_label = "VisualUV overlay operator"
+    bl_description = "Draw VisualUV overlay"
+    bl_options = {'REGISTER', 'INTERNAL'}
 
-        if visualuv.recalculate:
-            self.recalculate_info(context, obj)
+    def modal(self, context, event):
+        global MANAGER_RUNNING
+        if not MANAGER_RUNNING:
+            return {'FINISHED'}
+        for obj in list(OVERLAYS):
+            try:
+                enabled = obj.visualuv.enabled
+            except ReferenceError:
+                enabled = False
+            if not enabled:
+                untrack_object(obj)
+        if not OVERLAYS:
+            MANAGER_RUNNING = False
+            return {'FINISHED'}
+
+        # images are only looked at when one was added or removed, or an overlay lost its image
+        image_count = len(bpy.data.images)
+        images_changed = image_count != self.image_count
+        if images_changed:
+            self.image_count = image_count
+
+        # mesh edits are reported by the depsgraph handler, only explicit refreshes arrive here,
+        # all of them are scheduled together
+        for overlay in OVERLAYS.values():
+            visualuv = overlay.obj.visualuv
+            if images_changed or not visualuv.image:
+                overlay.check_image_exists()
+            if visualuv.recalculate:
+                visualuv.recalculate = False
+                # changed settings can move the object to results another object already computed
+                shared, outdated = overlay.attach(context)
+                if outdated:
+                    # the handler takes the operation write for a property update, so a switched
+                    # metric reaches the refresh without changes and keeps the mesh snapshot
+                    request_refresh(shared, set() if shared.metric_switched(context, overlay.obj) else None)
+            # areas are only redrawn for overlays which changed since their last redraw
+            overlay.tag_redraw(context)
+        # textures of images no overlay shows any more are freed
+        release_unused_textures()
         return {'PASS_THROUGH'}
 
     def invoke(self, context, event):
-        self.invoked_obj = context.object
-        obj = self.invoked_obj
-        self.check_image_exists()
-        self.recalculate_info(context, obj)
-        create_overlay_3d(self.draw_overlay)
-        create_overlay_2d(self.draw_overlay_uv) 
-        MODAL_HANDLERS[obj] = self
+        # every enabled object is tracked by the one running manager
+        global MANAGER_RUNNING
+        obj = context.object
+        if obj is not None and obj.visualuv.enabled:
+            track_object(context, obj)
+        if MANAGER_RUNNING or not OVERLAYS:
+            return {'FINISHED'}
+        MANAGER_RUNNING = True
+        self.image_count = len(bpy.data.images)
         context.window_manager.modal_handler_add(self)
         return {'RUNNING_MODAL'}
-
-    def check_image_exists(self):
-        visualuv = self.invoked_obj.visualuv
-        if not visualuv.image:
-            visualuv.image = get_checker_image()
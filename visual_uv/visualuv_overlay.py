@@ -0,0 +1,637 @@
+import threading
+import time
+import numpy as np
+
+from .visualuv_analysis import (
+    uv_normal_input,
+    UVIslands,
+    corner_records,
+    corner_records_bytes,
+)
+from .visualuv_parallel import MetricKernels, SharedArray, polygon_bounds
+from .visualuv_profile import RefreshProfile
+
+COLOR_BLUE = 2.0 / 3.0
+COLOR_RED = 1.0
+COLOR_NEGATIVE = -1.0
+HSV_MIN_HUE = 0.0
+HSV_MAX_HUE = 1.0
+
+EMPTY = 0.0
+
+MEGABYTE = 1024 * 1024
+# memory the corners and metric temporaries of a chunk may take while they are streamed into the
+# overlay buffers, the other stages are only reported
+MEMORY_BUDGET = 256 * MEGABYTE
+# most memory a streamed triangle takes besides the buffers, its gathered corners and the metric
+# temporaries, the angle stretching takes the most with about 500 bytes
+STREAM_TRIANGLE_BYTES = 512
+MIN_STREAM_TRIANGLES = 1024
+# memory np.unique takes for every triangle corner it sorts
+UNIQUE_CORNER_BYTES = 48
+# most memory UVIslands takes for every loop, measured on the benchmark meshes
+ISLAND_LOOP_BYTES = 128
+
+# triangle corner data uploaded once per vertex record, buffer name => (corner array, shader input, components)
+RECORD_BUFFERS = {
+    'verts': ('verts', "position", 3),
+    'normals': ('normals', "normal", 3),
+    'input': ('input', "input", 2),
+    'vert_directions': ('vert_directions', "direction", 3),
+    'tex_coords': ('tex_coords', "uv", 3),
+    'uv_positions': ('tex_coords', "position", 3),
+}
+# corner arrays deciding which corners share a vertex record, together with the vertex
+RECORD_KEYS = ('tex_coords', 'input')
+SELECTED_TRIANGLES = 'selected_triangles'
+# records split off since the records were built, as a share of them, before they are built again
+RECORD_SPLIT_LIMIT = 0.125
+
+# wireframe data uploaded once per wireframe point, attribute name => (shader input, components)
+VERTEX_BUFFERS = {
+    'wireframe_coords': ("position", 3),
+    'wireframe_normals': ("normal", 3),
+    'wireframe_directions': ("direction", 3),
+    'wireframe_vertex_colors': ("color", 4),
+}
+# every wireframe edge is drawn in a single color, edge batch => theme color
+WIREFRAME_EDGE_COLORS = {
+    'edge': 'edge',
+    'edge_select': 'edge_select',
+    'seam': 'edge_seam',
+}
+WIREFRAME_LAYOUT = 'wireframe_layout'
+SELECTED_EDGES = 'selected_edges'
+
+
+def corner_bits(values):
+    # adding zero turns -0.0 into 0.0, the bits of equal values are equal, NaN included
+    return (np.asarray(values, dtype=np.float32) + np.float32(0.0)).view(np.uint32)
+
+
+def corner_rows(triangles, corners=3):
+    # every triangle owns consecutive rows in the triangle buffers
+    return (np.asarray(triangles)[:, np.newaxis] * corners + np.arange(corners)).ravel()
+
+
+class OverlaySettings():
+
+    # any change of these but the metric invalidates all previously computed buffers
+    def __init__(self, operation, stretch_type, explosion_view, location, show_wire, fill_texture, mode, uv_select_sync, theme_colors, kernels=None, memory_budget=MEMORY_BUDGET):
+        self.operation = operation
+        self.stretch_type = stretch_type
+        self.explosion_view = explosion_view
+        self.location = location
+        self.show_wire = show_wire
+        self.fill_texture = fill_texture
+        self.mode = mode
+        self.uv_select_sync = uv_select_sync
+        self.theme_colors = theme_colors
+        # how the metrics are computed and streamed does not change the result, so it is not part of the key
+        self.kernels = kernels if kernels is not None else MetricKernels()
+        self.memory_budget = memory_budget
+
+    def metric(self):
+        # the metric shown by the overlay, a change only replaces the input of every corner
+        return (self.operation, self.stretch_type if self.operation == 'UV_STRETCHING' else None)
+
+    def layout_key(self):
+        return (
+            self.explosion_view,
+            self.location if self.explosion_view else None,
+            self.show_wire,
+            self.fill_texture,
+            self.mode,
+            self.uv_select_sync,
+            tuple(tuple(color) for color in self.theme_colors.values())
+        )
+
+    def key(self):
+        return self.metric() + self.layout_key()
+
+    def __eq__(self, other):
+        return isinstance(other, OverlaySettings) and self.key() == other.key()
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class OverlayJob():
+
+    # everything a refresh needs, copied out of Blender on the main thread
+    def __init__(self, arrays, settings, profile=None):
+        self.arrays = arrays
+        self.settings = settings
+        self.profile = profile if profile is not None else RefreshProfile()
+        self.cancelled = threading.Event()
+        self.snapshot_seconds = 0.0
+        self.compute_seconds = 0.0
+
+
+class OverlayBuffers():
+
+    # buffer data of a finished refresh, uploaded to the GPU on the main thread
+    # vertex buffer name => (shader input, components, data), index buffer name => (primitive, indices)
+    def __init__(self, settings, vertex_data, index_data, buffer_bytes):
+        self.settings = settings
+        self.vertex_data = vertex_data
+        self.index_data = index_data
+        self.buffer_bytes = buffer_bytes
+        self.profile = RefreshProfile()
+
+    def upload_bytes(self):
+        vertex_bytes = sum(data.nbytes for _, _, data in self.vertex_data.values())
+        return vertex_bytes + sum(indices.nbytes for _, indices in self.index_data.values())
+
+    def merge(self, previous):
+        # a result which was never drawn still holds buffers the newer result did not change
+        self.vertex_data = {**previous.vertex_data, **self.vertex_data}
+        self.index_data = {**previous.index_data, **self.index_data}
+        return self
+
+
+class OverlayData():
+
+    # CPU side of an overlay, only ever used by one refresh at a time and never touching bpy,
+    # so it can be computed on the worker thread
+    def __init__(self):
+        self.arrays = None
+        self.settings = None
+        self.unprepared = set()
+        # input of every metric shown since the mesh last changed, metric => corner input
+        self.metric_inputs = dict()
+        # stages of the refresh being computed
+        self.profile = RefreshProfile()
+        # corner arrays the worker processes read and write in place, freed once the overlay drops them
+        self.shared_arrays = []
+        self.clear_properties()
+
+    def __del__(self):
+        # the arrays viewing the shared memory have to be gone before it is closed
+        for name, value in list(vars(self).items()):
+            if isinstance(value, np.ndarray):
+                setattr(self, name, None)
+        self.metric_inputs = dict()
+        self.free_shared_arrays()
+
+    def corner_array(self, shape, dtype):
+        # arrays of meshes split between processes are allocated in shared memory, the workers
+        # map them by name instead of receiving a copy for every kernel
+        if self.settings is None or not self.settings.kernels.chunked(len(self.triangles)):
+            return np.zeros(shape, dtype=dtype)
+        shared = SharedArray(shape, dtype)
+        self.shared_arrays.append(shared)
+        return shared.array
+
+    def free_shared_arrays(self):
+        # shared memory no array of the overlay uses any more is freed
+        held = {id(value) for value in vars(self).values() if isinstance(value, np.ndarray)}
+        held |= {id(input) for input in self.metric_inputs.values()}
+        for shared in list(self.shared_arrays):
+            if id(shared.array) not in held:
+                self.shared_arrays.remove(shared)
+                shared.release()
+
+    def recalculate_poly_islands(self, arrays):
+        settings = self.settings
+        self.profile.track_memory(self.held_bytes() + ISLAND_LOOP_BYTES * len(arrays.loop_uvs))
+        islands = UVIslands(arrays.loop_vertices, arrays.loop_uvs, arrays.loop_polygons, arrays.polygon_center)
+        if not islands.count:
+            return
+        step = HSV_MAX_HUE / islands.count
+        self.island_colors[:, 0] = HSV_MIN_HUE + (islands.polygon_islands + 1) * step
+        if settings.explosion_view:
+            self.directions = islands.explosion_directions(settings.location)[islands.polygon_islands]
+
+    def calc_uv_island_colors(self, polygons):
+        return np.repeat(self.island_colors[polygons], 3, axis=0)
+
+    def recalculate_uv_normals(self, uv_coords):
+        return uv_normal_input(self.settings.kernels.signed_uv_areas(uv_coords), COLOR_BLUE, COLOR_RED)
+
+    def recalculate_uv_overlap(self, arrays, polygons, uv_coords):
+        kernels = self.settings.kernels
+        self.overlapped_polygons, self.overlap_areas = kernels.uv_overlaps(uv_coords, polygons, arrays.polygon_count)
+        overlapped = np.repeat(self.overlapped_polygons[polygons], 3)
+        triangle_input = np.zeros((len(overlapped), 2), dtype=np.float32)
+        triangle_input[:, 0] = np.where(overlapped, COLOR_BLUE, COLOR_NEGATIVE)
+        return triangle_input
+
+    def recalculate_stretching(self, arrays, tri_loops, polygons, triangle_coords, uv_coords, out=None):
+            settings = self.settings
+            return settings.kernels.stretching(settings.stretch_type, triangle_coords, uv_coords, tri_loops, polygons, out)
+
+    def recalc_triangle_input(self, arrays, tri_loops, polygons, triangle_coords, uv_coords, out=None):
+        # out is only filled by the stretching, which the worker processes write in place
+        operation = self.settings.operation
+        if operation == 'UV_ISLANDS':
+            return self.calc_uv_island_colors(polygons)
+        elif operation == 'UV_STRETCHING':
+            return self.recalculate_stretching(arrays, tri_loops, polygons, triangle_coords, uv_coords, out)
+        elif operation == 'UV_NORMALS':
+            return self.recalculate_uv_normals(uv_coords)
+        elif operation == 'UV_OVERLAP':
+            return self.recalculate_uv_overlap(arrays, polygons, uv_coords)
+        triangle_input = np.zeros((3 * len(polygons), 2), dtype=np.float32)
+        triangle_input[:, 0] = COLOR_NEGATIVE
+        return triangle_input
+
+    def clear_properties(self, polygon_count=0, triangle_count=0):
+        self.directions = np.zeros((polygon_count, 3), dtype=np.float32)
+        self.island_colors = np.zeros((polygon_count, 2), dtype=np.float32)
+
+        self.verts = self.corner_array((3 * triangle_count, 3), np.float32)
+        self.normals = np.zeros((3 * triangle_count, 3), dtype=np.float32)
+        self.vert_directions = np.zeros((3 * triangle_count, 3), dtype=np.float32)
+        self.input = self.corner_array((3 * triangle_count, 2), np.float32)
+        self.tex_coords = self.corner_array((3 * triangle_count, 3), np.float32)
+        self.face_selected = np.zeros(triangle_count, dtype=bool)
+        # built from the corners by the next buffer preparation
+        self.record_corners = None
+        self.record_triangles = None
+        self.built_records = 0
+        self.uv_selected = np.zeros(triangle_count, dtype=bool)
+
+        self.wireframe_vertices = np.zeros(0, dtype=np.int32)
+        self.wireframe_edges = np.zeros(0, dtype=np.int32)
+        self.wireframe_segments = np.zeros((0, 2), dtype=np.int32)
+        self.wireframe_coords = np.zeros((0, 3), dtype=np.float32)
+        self.wireframe_normals = np.zeros((0, 3), dtype=np.float32)
+        self.wireframe_directions = np.zeros((0, 3), dtype=np.float32)
+        self.wireframe_vertex_colors = np.zeros((0, 4), dtype=np.float32)
+        self.selected_edges = np.zeros(0, dtype=bool)
+        self.seam_edges = np.zeros(0, dtype=bool)
+
+    def shows_wireframe(self):
+        return self.settings.show_wire and self.settings.mode == 'EDIT'
+
+    def calc_wireframe_layout(self, arrays):
+        # one segment for every edge of the visible triangles, moved along with the polygon of
+        # the first triangle using it in the explosion view
+        self.profile.track_memory(self.held_bytes() + UNIQUE_CORNER_BYTES * self.tri_loops.size)
+        edges, first_corners = np.unique(arrays.loop_edges[self.tri_loops].ravel(), return_index=True)
+        vertices = arrays.edge_vertices[edges].ravel()
+        directions = np.repeat(self.directions[self.polygons[first_corners // 3]], 2, axis=0)
+
+        # segment ends with the same vertex and direction are one wireframe point
+        layout_bytes = edges.nbytes + first_corners.nbytes + vertices.nbytes + directions.nbytes
+        self.profile.track_memory(self.held_bytes() + layout_bytes + corner_records_bytes(len(vertices), directions.shape[1]))
+        point_ends, segments = corner_records(vertices, directions)
+        self.wireframe_edges = edges
+        self.wireframe_segments = segments.reshape(-1, 2)
+        self.wireframe_vertices = vertices[point_ends]
+        self.wireframe_directions = directions[point_ends]
+
+    def fill_wireframe_geometry(self, arrays):
+        self.wireframe_coords = arrays.vertex_co[self.wireframe_vertices]
+        self.wireframe_normals = arrays.vertex_normals[self.wireframe_vertices]
+
+    def fill_wireframe_colors(self, arrays):
+        colors = self.settings.theme_colors
+        vertex_select = arrays.vertex_select[self.wireframe_vertices][:, np.newaxis]
+        self.wireframe_vertex_colors = np.where(vertex_select, colors['vertex_select'], colors['vertex'])
+
+    def fill_wireframe_selection(self, arrays):
+        self.selected_edges = arrays.edge_select[self.wireframe_edges]
+        self.seam_edges = arrays.edge_seam[self.wireframe_edges]
+
+    def rebuild_wireframe(self, arrays):
+        self.calc_wireframe_layout(arrays)
+        self.fill_wireframe_geometry(arrays)
+        self.fill_wireframe_colors(arrays)
+        self.fill_wireframe_selection(arrays)
+        return set(VERTEX_BUFFERS) | {WIREFRAME_LAYOUT, SELECTED_EDGES}
+
+    def fill_face_selection(self, arrays):
+        # selected faces are highlighted in the 3D Viewport and drawn in the UV Editor
+        self.face_selected = arrays.polygon_select[self.polygons]
+        if self.settings.uv_select_sync:
+            self.uv_selected = np.ones(len(self.polygons), dtype=bool)
+        else:
+            self.uv_selected = self.face_selected
+
+    def held_bytes(self):
+        # every array the overlay keeps between refreshes, the inputs of the other metrics included
+        arrays = [value for value in vars(self).values() if isinstance(value, np.ndarray)]
+        arrays += [input for input in self.metric_inputs.values() if input is not self.input]
+        return sum(array.nbytes for array in arrays)
+
+    def stream_chunks(self, triangles=None, whole=False):
+        # splits the triangles into chunks of whole polygons sized by the memory budget and yields the
+        # triangles and corner rows of every chunk, all triangles of the overlay are yielded as slices
+        polygons = self.polygons if triangles is None else self.polygons[triangles]
+        count = len(polygons)
+        chunk_triangles = max(self.settings.memory_budget // STREAM_TRIANGLE_BYTES, MIN_STREAM_TRIANGLES)
+        # polygons are only kept together by sorted triangles
+        if whole or count <= chunk_triangles or np.any(polygons[1:] < polygons[:-1]):
+            bounds = np.array([0, count])
+        else:
+            bounds = polygon_bounds(polygons, -(-count // chunk_triangles))
+        if count:
+            self.profile.track_memory(self.held_bytes() + int(np.diff(bounds).max()) * STREAM_TRIANGLE_BYTES)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if triangles is None:
+                yield slice(start, stop), slice(3 * start, 3 * stop)
+            else:
+                chunk = triangles[start:stop]
+                yield chunk, corner_rows(chunk)
+
+    def fill_corners(self, arrays, triangles, rows):
+        tri_vertices = self.tri_vertices[triangles].ravel()
+        self.verts[rows] = arrays.vertex_co[tri_vertices]
+        self.normals[rows] = arrays.vertex_normals[tri_vertices]
+        self.tex_coords[rows, :2] = arrays.loop_uvs[self.tri_loops[triangles].ravel()]
+
+    def stream_input(self, arrays, triangles=None):
+        # the metric of a chunk is computed from its corners in the buffers, the overlap test
+        # and meshes split between processes take all triangles at once
+        settings = self.settings
+        count = len(self.polygons) if triangles is None else len(triangles)
+        whole = settings.operation == 'UV_OVERLAP' or settings.kernels.chunked(count)
+        for chunk, rows in self.stream_chunks(triangles, whole):
+            triangle_coords = self.verts[rows].reshape(-1, 3, 3)
+            uv_coords = self.tex_coords[rows].reshape(-1, 3, 3)
+            self.input[rows] = self.recalc_triangle_input(arrays, self.tri_loops[chunk], self.polygons[chunk], triangle_coords, uv_coords, self.input[rows])
+
+    def rebuild_info(self, arrays):
+        settings = self.settings
+
+        # hidden polygons are not part of the overlay
+        self.triangles = np.flatnonzero(~arrays.polygon_hide[arrays.tri_polygons])
+        self.tri_vertices = arrays.tri_vertices[self.triangles]
+        # the previous corner arrays are dropped before the new ones take their memory
+        self.polygons = self.tri_loops = None
+        self.metric_inputs = dict()
+        self.clear_properties(arrays.polygon_count, len(self.triangles))
+        self.free_shared_arrays()
+        self.polygons = self.corner_array((len(self.triangles),), arrays.tri_polygons.dtype)
+        self.tri_loops = self.corner_array((len(self.triangles), 3), arrays.tri_loops.dtype)
+        np.take(arrays.tri_polygons, self.triangles, axis=0, out=self.polygons)
+        np.take(arrays.tri_loops, self.triangles, axis=0, out=self.tri_loops)
+        profile = self.profile
+        profile.triangles = len(self.triangles)
+
+        if settings.operation == 'UV_ISLANDS' or settings.explosion_view:
+            with profile.stage('islands'):
+                self.recalculate_poly_islands(arrays)
+
+        # the corners are streamed into the preallocated buffers chunk by chunk
+        with profile.stage('triangles'):
+            for triangles, rows in self.stream_chunks():
+                self.fill_corners(arrays, triangles, rows)
+                self.vert_directions[rows] = np.repeat(self.directions[self.polygons[triangles]], 3, axis=0)
+            self.fill_face_selection(arrays)
+
+        if self.shows_wireframe():
+            with profile.stage('wireframe'):
+                self.rebuild_wireframe(arrays)
+
+        # get info for the 3D Vieport shader
+        with profile.stage(settings.operation.lower()):
+            self.stream_input(arrays)
+        self.metric_inputs = {settings.metric(): self.input}
+        return set(RECORD_BUFFERS) | set(VERTEX_BUFFERS) | {SELECTED_TRIANGLES, WIREFRAME_LAYOUT, SELECTED_EDGES}
+
+    def update_info(self, previous, arrays):
+        settings = self.settings
+        changed = set()
+
+        # only polygons touching a changed vertex, vertex normal or UV are recomputed,
+        # vertex normals also change around moved vertices, which pulls in the neighbouring polygons
+        moved_vertices = arrays.changed_vertices(previous)
+        changed_loops = arrays.changed_uvs(previous)
+        dirty_loops = moved_vertices[arrays.loop_vertices] | changed_loops
+        dirty_polygons = np.zeros(arrays.polygon_count, dtype=bool)
+        dirty_polygons[arrays.loop_polygons[dirty_loops]] = True
+        dirty_triangles = np.flatnonzero(dirty_polygons[self.polygons])
+
+        if len(dirty_triangles):
+            for triangles, rows in self.stream_chunks(dirty_triangles):
+                self.fill_corners(arrays, triangles, rows)
+            changed |= {'verts', 'normals'}
+            # the UVs decide the vertex records, moved vertices alone keep them
+            if changed_loops[self.tri_loops[dirty_triangles]].any():
+                changed.add('tex_coords')
+            if settings.operation in ('UV_STRETCHING', 'UV_NORMALS'):
+                self.stream_input(arrays, dirty_triangles)
+                changed.add('input')
+
+        # islands, explosion directions and overlaps depend on the whole UV layout
+        uvs_changed = changed_loops.any()
+        islands_changed = uvs_changed or (settings.explosion_view and moved_vertices.any())
+        if (settings.operation == 'UV_ISLANDS' or settings.explosion_view) and islands_changed:
+            self.directions[:] = EMPTY
+            self.island_colors[:] = EMPTY
+            self.recalculate_poly_islands(arrays)
+            if settings.explosion_view:
+                self.vert_directions[:] = np.repeat(self.directions[self.polygons], 3, axis=0)
+                changed.add('vert_directions')
+                # new directions can split or merge wireframe points
+                if self.shows_wireframe():
+                    changed |= self.rebuild_wireframe(arrays)
+            if settings.operation == 'UV_ISLANDS':
+                self.input = self.calc_uv_island_colors(self.polygons)
+                changed.add('input')
+        if settings.operation == 'UV_OVERLAP' and uvs_changed:
+            self.stream_input(arrays)
+            changed.add('input')
+
+        # the inputs of the other metrics were computed for the previous mesh
+        if len(dirty_triangles) or uvs_changed:
+            self.metric_inputs = dict()
+        self.metric_inputs[settings.metric()] = self.input
+
+        if WIREFRAME_LAYOUT not in changed and moved_vertices[self.wireframe_vertices].any():
+            self.fill_wireframe_geometry(arrays)
+            changed |= {'wireframe_coords', 'wireframe_normals'}
+
+        changed |= self.update_selection(previous, arrays)
+        return changed
+
+    def switch_metric(self, arrays):
+        # a metric shown before on the same mesh is reused, any other is computed once for all triangles
+        settings = self.settings
+        metric = settings.metric()
+        if metric not in self.metric_inputs:
+            with self.profile.stage(settings.operation.lower()):
+                # without the explosion view the islands are only known while they are shown
+                if settings.operation == 'UV_ISLANDS' and not settings.explosion_view:
+                    self.recalculate_poly_islands(arrays)
+                # the input of the metric shown before stays untouched in the memo
+                self.input = self.corner_array((3 * len(self.triangles), 2), np.float32)
+                self.stream_input(arrays)
+                self.metric_inputs[metric] = self.input
+        self.input = self.metric_inputs[metric]
+        return {'input'}
+
+    def update_selection(self, previous, arrays):
+        changed = set()
+        selected_polygons = arrays.polygon_select != previous.polygon_select
+        if selected_polygons[self.polygons].any():
+            self.fill_face_selection(arrays)
+            changed.add(SELECTED_TRIANGLES)
+
+        selected_vertices = arrays.vertex_select != previous.vertex_select
+        if selected_vertices[self.wireframe_vertices].any():
+            self.fill_wireframe_colors(arrays)
+            changed.add('wireframe_vertex_colors')
+        selected_edges = (arrays.edge_select != previous.edge_select) | (arrays.edge_seam != previous.edge_seam)
+        if selected_edges[self.wireframe_edges].any():
+            self.fill_wireframe_selection(arrays)
+            changed.add(SELECTED_EDGES)
+        return changed
+
+    def build_records(self):
+        # triangle corners sharing the vertex, the UV and the metric become one vertex record,
+        # normals and explosion directions follow the vertex and the UV island, the inputs of the
+        # other known metrics also split the records, so switching back to them keeps the records
+        inputs = self.record_inputs()
+        components = self.tex_coords.shape[1] + sum(input.shape[1] for input in inputs)
+        self.profile.track_memory(self.held_bytes() + corner_records_bytes(self.tri_vertices.size, components))
+        self.record_corners, records = corner_records(self.tri_vertices, self.tex_coords, *inputs)
+        self.record_triangles = records.reshape(-1, 3)
+        self.built_records = len(self.record_corners)
+
+    def record_inputs(self):
+        return [self.input] + [input for input in self.metric_inputs.values() if input is not self.input]
+
+    def split_records(self, keys):
+        # corners whose UV or input no longer matches their record get records of their own, appended
+        # to the others, so an edit costs no new sort of all corners. Returns whether the records
+        # changed, or None when too many were split and they have to be built again
+        if self.record_corners is None:
+            return None
+        records = self.record_triangles.ravel()
+        misfits = np.zeros(len(records), dtype=bool)
+        for name in keys:
+            bits = corner_bits(getattr(self, name))
+            misfits |= np.any(bits[self.record_corners][records] != bits, axis=1)
+        misfits = np.flatnonzero(misfits)
+        if not len(misfits):
+            return False
+        if len(self.record_corners) - self.built_records + len(misfits) > self.built_records * RECORD_SPLIT_LIMIT:
+            return None
+        inputs = self.record_inputs()
+        components = self.tex_coords.shape[1] + sum(input.shape[1] for input in inputs)
+        self.profile.track_memory(self.held_bytes() + records.nbytes + corner_records_bytes(len(misfits), components))
+        # the first corner of a record always matches it, so the records keep their values
+        firsts, split = corner_records(
+            self.tri_vertices.ravel()[misfits],
+            self.tex_coords[misfits],
+            *[input[misfits] for input in inputs]
+        )
+        records = records.copy()
+        records[misfits] = len(self.record_corners) + split
+        self.record_corners = np.concatenate([self.record_corners, misfits[firsts]])
+        self.record_triangles = records.reshape(-1, 3)
+        return True
+
+    def calc_buffer_bytes(self):
+        # memory of the indexed buffers, compared to one vertex for every drawn triangle corner
+        corners = 3 * len(self.triangles)
+        uv_corners = 3 * np.count_nonzero(self.uv_selected)
+        # face colors add 4 floats to every record, UV Editor corners take a position and an input
+        record_floats = sum(length for _, _, length in RECORD_BUFFERS.values()) + 4
+        uv_floats = RECORD_BUFFERS['uv_positions'][2] + RECORD_BUFFERS['input'][2]
+        indexed_bytes = 4 * record_floats * len(self.record_corners)
+        indexed_bytes += 4 * (corners + 3 * np.count_nonzero(self.face_selected) + uv_corners)
+        soup_bytes = 4 * (record_floats - RECORD_BUFFERS['uv_positions'][2]) * corners + 4 * uv_floats * uv_corners
+
+        # wireframe points carry a color for every edge batch, each edge is indexed by all segments
+        # and by one of the selected or unselected edges, the triangle wireframe had 6 slots per triangle
+        if self.shows_wireframe():
+            point_floats = sum(length for _, length in VERTEX_BUFFERS.values()) + 4 * len(WIREFRAME_EDGE_COLORS)
+            slot_floats = sum(length for _, length in VERTEX_BUFFERS.values()) + 4 * (len(WIREFRAME_EDGE_COLORS) - 1)
+            indexed_bytes += 4 * point_floats * len(self.wireframe_vertices)
+            indexed_bytes += 4 * 2 * (2 * len(self.wireframe_edges) + np.count_nonzero(self.seam_edges))
+            soup_bytes += 4 * slot_floats * 6 * len(self.triangles)
+        return (int(indexed_bytes), int(soup_bytes - indexed_bytes))
+
+    def prepare_buffers(self, changed):
+        theme_colors = self.settings.theme_colors
+        vertex_data = dict()
+        index_data = dict()
+
+        # records change only when an array deciding the merge changed, corners leaving their record
+        # are split off, any other changed record buffer is gathered through the previous records
+        keys = changed.intersection(RECORD_KEYS)
+        split = self.split_records(keys) if keys else False
+        if split is None:
+            self.build_records()
+        if split is not False:
+            changed = changed | set(RECORD_BUFFERS) | {SELECTED_TRIANGLES}
+            index_data['triangles'] = ('TRIS', self.record_triangles)
+            vertex_data['face_colors'] = ("color", 4, np.tile(theme_colors['face_select'], (len(self.record_corners), 1)))
+
+        # only the vertex buffers whose corner array changed are uploaded again, the rest is reused
+        changed = changed | {name for name, (corners, _, _) in RECORD_BUFFERS.items() if corners in changed}
+        for name in changed.intersection(RECORD_BUFFERS):
+            corners, attr_id, length = RECORD_BUFFERS[name]
+            vertex_data[name] = (attr_id, length, getattr(self, corners)[self.record_corners])
+        for name in changed.intersection(VERTEX_BUFFERS):
+            attr_id, length = VERTEX_BUFFERS[name]
+            vertex_data[name] = (attr_id, length, getattr(self, name))
+
+        # edges are colored by the batch they are drawn with, an edge selection change only swaps index buffers
+        if WIREFRAME_LAYOUT in changed:
+            index_data['edges'] = ('LINES', self.wireframe_segments)
+            for name, color in WIREFRAME_EDGE_COLORS.items():
+                vertex_data[name + '_colors'] = ("color", 4, np.tile(theme_colors[color], (len(self.wireframe_vertices), 1)))
+        if SELECTED_EDGES in changed:
+            index_data['edge'] = ('LINES', self.wireframe_segments[~self.selected_edges])
+            index_data['edge_select'] = ('LINES', self.wireframe_segments[self.selected_edges])
+            index_data['seam'] = ('LINES', self.wireframe_segments[self.seam_edges])
+
+        # a selection change only swaps the index buffers of the selected faces
+        if SELECTED_TRIANGLES in changed:
+            index_data['face_triangles'] = ('TRIS', self.record_triangles[self.face_selected])
+            index_data['uv_triangles'] = ('TRIS', self.record_triangles[self.uv_selected])
+
+        return OverlayBuffers(self.settings, vertex_data, index_data, self.calc_buffer_bytes())
+
+    def compute(self, job):
+        # runs on the worker thread, every array handed to the main thread is a new one and never
+        # modified afterwards, so the main thread can upload it while the next refresh is computed
+        if job.cancelled.is_set():
+            return None
+        start = time.perf_counter()
+        previous = self.arrays
+        profile = self.profile = job.profile
+        try:
+            settings = self.settings
+            if previous is None or job.settings.layout_key() != settings.layout_key() or not job.arrays.has_same_topology(previous):
+                self.settings = job.settings
+                changed = self.rebuild_info(job.arrays)
+            else:
+                self.settings = job.settings
+                profile.triangles = len(self.triangles)
+                # the new metric is switched to on the previous mesh, the update then patches it
+                changed = set()
+                if job.settings.metric() != settings.metric():
+                    changed = self.switch_metric(previous)
+                with profile.stage('update'):
+                    changed |= self.update_info(previous, job.arrays)
+            self.arrays = job.arrays
+
+            # a newer snapshot is waiting, the buffers of this one are prepared together with it
+            changed |= self.unprepared
+            if job.cancelled.is_set():
+                self.unprepared = changed
+                return None
+            self.unprepared = set()
+            buffers = None
+            if changed:
+                with profile.stage('buffer_packing') as stage:
+                    buffers = self.prepare_buffers(changed)
+                    buffers.profile = profile
+                    stage.buffer_bytes = buffers.upload_bytes()
+                    # the gathered buffers are held until they are uploaded, next to the corners they came from
+                    profile.track_memory(self.held_bytes() + stage.buffer_bytes)
+            self.free_shared_arrays()
+        except Exception:
+            # the next refresh starts from scratch
+            self.arrays = None
+            self.unprepared = set()
+            raise
+        job.compute_seconds = time.perf_counter() - start
+        return buffers
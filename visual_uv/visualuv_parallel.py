@@ -0,0 +1,305 @@
+import os
+import site
+import importlib
+import threading
+import traceback
+import multiprocessing
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+try:
+    from .visualuv_analysis import (
+        stretching,
+        signed_uv_areas,
+        candidate_pairs,
+        pair_overlap_areas,
+        polygon_overlaps,
+        OVERLAP_EPSILON,
+    )
+except ImportError:
+    # worker processes import this module on its own, without the add-on package and bpy
+    from visualuv_analysis import (
+        stretching,
+        signed_uv_areas,
+        candidate_pairs,
+        pair_overlap_areas,
+        polygon_overlaps,
+        OVERLAP_EPSILON,
+    )
+
+MODULE_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+WORKER_MODULE = 'visualuv_parallel'
+
+# meshes with fewer loop triangles are computed in-process, starting the work costs more than it saves
+PROCESS_THRESHOLD = 500000
+# every process gets several chunks, so a process finishing early takes over the remaining ones
+CHUNKS_PER_PROCESS = 4
+
+# one process pool shared by all overlays, recreated when the process count preference changes
+POOL = None
+POOL_SIZE = 0
+POOL_LOCK = threading.Lock()
+# memory name => shared array created in this process, arrays viewing one are passed to the workers by name
+SHARED_ARRAYS = dict()
+# released memory still viewed by an array, it is closed once the last view is gone
+UNCLOSED_MEMORIES = []
+SHARED_LOCK = threading.Lock()
+
+
+def get_pool(process_count):
+    global POOL, POOL_SIZE
+    with POOL_LOCK:
+        if POOL is None or POOL_SIZE != process_count:
+            if POOL is not None:
+                POOL.shutdown(wait=True)
+            # forking Blender with its threads is unsafe, the processes start a fresh interpreter,
+            # which finds this module by its own name in the module directory
+            POOL = ProcessPoolExecutor(
+                max_workers=process_count,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=site.addsitedir,
+                initargs=(MODULE_DIRECTORY,)
+            )
+            POOL_SIZE = process_count
+        return POOL
+
+
+def shutdown_pool():
+    global POOL, POOL_SIZE
+    with POOL_LOCK:
+        if POOL is not None:
+            POOL.shutdown(wait=True, cancel_futures=True)
+        POOL = None
+        POOL_SIZE = 0
+
+
+class WorkerModule():
+
+    # unpickled in a worker process as this module imported by its own name, without the add-on
+    # package and bpy, Blender itself keeps importing it through the package only
+    def __reduce__(self):
+        return (importlib.import_module, (WORKER_MODULE,))
+
+
+class WorkerFunction():
+
+    # a function of this module, pickled by name and looked up in the worker process
+    def __init__(self, name):
+        self.name = name
+
+    def __reduce__(self):
+        return (getattr, (WorkerModule(), self.name))
+
+
+class SharedArray():
+
+    # an array in shared memory, worker processes map it by name instead of receiving a copy,
+    # new shared memory is filled with zeros
+    def __init__(self, shape, dtype, data=None):
+        dtype = np.dtype(dtype)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self.description = (self.memory.name, tuple(shape), dtype.str, 0)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.memory.buf)
+        self.address = self.array.__array_interface__['data'][0]
+        if data is not None:
+            self.array[...] = data
+        with SHARED_LOCK:
+            SHARED_ARRAYS[self.memory.name] = self
+
+    @classmethod
+    def of(cls, data):
+        data = np.asarray(data)
+        return cls(data.shape, data.dtype, data)
+
+    def release(self):
+        # the name is removed at once, the memory can only be closed after its last view is gone
+        self.array = None
+        with SHARED_LOCK:
+            SHARED_ARRAYS.pop(self.memory.name, None)
+            self.memory.unlink()
+            UNCLOSED_MEMORIES.append(self.memory)
+            for memory in list(UNCLOSED_MEMORIES):
+                try:
+                    memory.close()
+                except BufferError:
+                    continue
+                UNCLOSED_MEMORIES.remove(memory)
+
+
+def shared_description(array):
+    # a contiguous array inside a shared array is described by the memory name and its offset, None otherwise
+    if not isinstance(array, np.ndarray) or not array.flags.c_contiguous:
+        return None
+    address = array.__array_interface__['data'][0]
+    with SHARED_LOCK:
+        for shared in SHARED_ARRAYS.values():
+            offset = address - shared.address
+            if 0 <= offset and offset + array.nbytes <= shared.memory.size:
+                return (shared.memory.name, array.shape, array.dtype.str, offset)
+    return None
+
+
+def run_chunk(task, descriptions, *args):
+    # runs in a worker process, the views of the shared arrays are gone before the memory is closed
+    memories = [shared_memory.SharedMemory(name=name) for name, _, _, _ in descriptions]
+    error = None
+    try:
+        arrays = [
+            np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+            for memory, (_, shape, dtype, offset) in zip(memories, descriptions)
+        ]
+        globals()[task](*arrays, *args)
+        arrays = None
+    except Exception:
+        arrays = None
+        error = traceback.format_exc()
+    for memory in memories:
+        memory.close()
+    if error is not None:
+        raise RuntimeError(error)
+
+
+def stretching_chunk(tri_coords, tri_uvs, tri_loops, tri_polygons, output, start, stop, stretch_type):
+    # the chunk holds whole polygons, their loops and polygons are renumbered from zero
+    loops = tri_loops[start:stop]
+    polygons = tri_polygons[start:stop]
+    first_loop = loops.min()
+    output[3 * start:3 * stop] = stretching(
+        stretch_type,
+        tri_coords[start:stop],
+        tri_uvs[start:stop],
+        loops - first_loop,
+        polygons - polygons[0],
+        int(loops.max() - first_loop) + 1,
+        int(polygons[-1] - polygons[0]) + 1
+    )
+
+
+def signed_areas_chunk(tri_uvs, output, start, stop):
+    output[start:stop] = signed_uv_areas(tri_uvs[start:stop])
+
+
+def overlap_chunk(tri_uvs, firsts, seconds, output, start, stop, epsilon):
+    # only the triangles of the chunk are taken from the shared UVs, renumbered in the order they are used
+    triangles, pairs = np.unique(np.concatenate((firsts[start:stop], seconds[start:stop])), return_inverse=True)
+    uvs = np.asarray(tri_uvs[triangles][:, :, :2], dtype=np.float64)
+    count = stop - start
+    output[start:stop] = pair_overlap_areas(uvs, pairs[:count], pairs[count:], epsilon)
+
+
+def chunk_bounds(length, chunk_count):
+    return np.unique(np.linspace(0, length, chunk_count + 1).astype(np.int64))
+
+
+def polygon_bounds(tri_polygons, chunk_count):
+    # chunk borders are moved to the first triangle of a polygon, so every polygon is reduced by one chunk
+    bounds = chunk_bounds(len(tri_polygons), chunk_count)
+    bounds[1:-1] = np.searchsorted(tri_polygons, tri_polygons[bounds[1:-1]])
+    return np.unique(bounds)
+
+
+class MetricKernels():
+
+    # computes the stretching, flip and overlap kernels in-process, or for large meshes
+    # split into chunks on a pool of processes sharing the input and output arrays
+    def __init__(self, process_count=1, threshold=PROCESS_THRESHOLD):
+        self.process_count = max(min(process_count, os.cpu_count() or 1), 1)
+        self.threshold = threshold
+
+    def chunked(self, triangle_count):
+        return self.process_count > 1 and triangle_count >= self.threshold
+
+    def run(self, task, inputs, output, bounds, *args):
+        # arrays in shared memory are passed to the workers by name and the output is written in place,
+        # other inputs are copied into shared memory for the call, another output is copied back afterwards
+        copies = []
+        try:
+            descriptions = []
+            for array in inputs:
+                description = shared_description(array)
+                if description is None:
+                    copies.append(SharedArray.of(array))
+                    description = copies[-1].description
+                descriptions.append(description)
+            written = output
+            description = shared_description(output)
+            if description is None:
+                written = SharedArray(output.shape, output.dtype)
+                copies.append(written)
+                description = written.description
+            descriptions.append(description)
+
+            pool = get_pool(self.process_count)
+            futures = [
+                pool.submit(WorkerFunction('run_chunk'), task, descriptions, int(start), int(stop), *args)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            # every chunk has to stop writing before the memory is released
+            wait(futures)
+            for future in futures:
+                future.result()
+            if written is not output:
+                output[...] = written.array
+            return output
+        finally:
+            for array in copies:
+                array.release()
+
+    def stretching(self, stretch_type, tri_coords, tri_uvs, tri_loops, tri_polygons, out=None):
+        # loops and polygons are numbered from the first one used, so a chunk only sums up its own range,
+        # polygons are reduced within one process chunk only when their triangles are consecutive
+        triangle_count = len(tri_polygons)
+        if not self.chunked(triangle_count) or np.any(tri_polygons[1:] < tri_polygons[:-1]):
+            if not triangle_count:
+                result = np.zeros((0, 2), dtype=np.float32)
+            else:
+                first_loop = tri_loops.min()
+                first_polygon = tri_polygons.min()
+                result = stretching(
+                    stretch_type,
+                    tri_coords,
+                    tri_uvs,
+                    tri_loops - first_loop,
+                    tri_polygons - first_polygon,
+                    int(tri_loops.max() - first_loop) + 1,
+                    int(tri_polygons.max() - first_polygon) + 1
+                )
+            if out is None:
+                return result
+            out[...] = result
+            return out
+        if out is None:
+            out = np.zeros((3 * triangle_count, 2), dtype=np.float32)
+        bounds = polygon_bounds(tri_polygons, self.process_count * CHUNKS_PER_PROCESS)
+        return self.run('stretching_chunk', (tri_coords, tri_uvs, tri_loops, tri_polygons), out, bounds, stretch_type)
+
+    def signed_uv_areas(self, tri_uvs):
+        triangle_count = len(tri_uvs)
+        if not self.chunked(triangle_count):
+            return signed_uv_areas(tri_uvs)
+        bounds = chunk_bounds(triangle_count, self.process_count * CHUNKS_PER_PROCESS)
+        return self.run('signed_areas_chunk', (tri_uvs,), np.zeros(triangle_count, dtype=np.float64), bounds)
+
+    def uv_overlaps(self, tri_uvs, tri_polygons, polygon_count, epsilon=OVERLAP_EPSILON):
+        # the grid broad phase stays in-process, every batch of candidate pairs is clipped in chunks,
+        # UVs outside shared memory are copied into it once for all batches
+        uvs = np.asarray(tri_uvs, dtype=np.float64)[:, :, :2]
+        flags = np.zeros(polygon_count, dtype=bool)
+        areas = np.zeros(polygon_count, dtype=np.float64)
+        chunked = self.chunked(len(tri_polygons))
+        shared_uvs = SharedArray.of(tri_uvs) if chunked and shared_description(tri_uvs) is None else None
+        try:
+            for firsts, seconds in candidate_pairs(uvs, tri_polygons):
+                if chunked:
+                    bounds = chunk_bounds(len(firsts), self.process_count * CHUNKS_PER_PROCESS)
+                    inputs = (tri_uvs if shared_uvs is None else shared_uvs.array, firsts, seconds)
+                    overlaps = self.run('overlap_chunk', inputs, np.zeros(len(firsts), dtype=np.float64), bounds, epsilon)
+                else:
+                    overlaps = pair_overlap_areas(uvs, firsts, seconds, epsilon)
+                polygon_overlaps(flags, areas, overlaps, firsts, seconds, tri_polygons)
+        finally:
+            if shared_uvs is not None:
+                shared_uvs.release()
+        return flags, areas
@@ -0,0 +1,87 @@
+import json
+import time
+import itertools
+import threading
+import traceback
+
+from contextlib import contextmanager
+
+# refreshes kept for every object
+PROFILE_HISTORY = 32
+MILLISECONDS = 1000.0
+
+REFRESH_IDS = itertools.count(1)
+LOG_LOCK = threading.Lock()
+
+
+class StageRecord():
+
+    def __init__(self, name, triangles):
+        self.name = name
+        self.seconds = 0.0
+        self.triangles = triangles
+        self.buffer_bytes = 0
+        # most memory the stage held at once, reported by the stages streaming their data
+        self.peak_bytes = 0
+
+
+class RefreshProfile():
+
+    # wall time, triangle count and buffer bytes of every stage of one refresh, the stages are
+    # recorded on the main thread and on the worker, but never by both at the same time
+    def __init__(self, object_name='', log_path=None):
+        self.object_name = object_name
+        self.log_path = log_path
+        self.refresh_id = next(REFRESH_IDS)
+        self.started = time.time()
+        self.triangles = 0
+        self.stages = []
+        self.open_stages = []
+
+    @contextmanager
+    def stage(self, name):
+        record = StageRecord(name, self.triangles)
+        self.open_stages.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            self.open_stages.pop()
+            self.stages.append(record)
+
+    def track_memory(self, peak_bytes):
+        # counted for the innermost stage running
+        if self.open_stages:
+            record = self.open_stages[-1]
+            record.peak_bytes = max(record.peak_bytes, peak_bytes)
+
+    @property
+    def peak_bytes(self):
+        return max((record.peak_bytes for record in self.stages), default=0)
+
+    @property
+    def seconds(self):
+        return sum(record.seconds for record in self.stages)
+
+    def write_log(self, records=None):
+        # one JSON line for every stage, the refresh id ties the stages of one refresh together
+        if not self.log_path:
+            return
+        records = self.stages if records is None else records
+        lines = [json.dumps({
+            'time': self.started,
+            'object': self.object_name,
+            'refresh': self.refresh_id,
+            'stage': record.name,
+            'milliseconds': record.seconds * MILLISECONDS,
+            'triangles': int(record.triangles),
+            'buffer_bytes': int(record.buffer_bytes),
+            'peak_bytes': int(record.peak_bytes),
+        }) for record in records]
+        # a log which cannot be written must not stop the refresh
+        try:
+            with LOG_LOCK, open(self.log_path, 'a') as file:
+                file.write(''.join(line + '\n' for line in lines))
+        except OSError:
+            traceback.print_exc()
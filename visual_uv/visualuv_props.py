@@ -1,5 +1,31 @@
 import bpy
-from bpy.props import BoolProperty, FloatVectorProperty, FloatProperty, EnumProperty, PointerProperty, IntProperty
+from bpy.props import BoolProperty, FloatVectorProperty, FloatProperty, EnumProperty, PointerProperty, IntProperty, StringProperty
+
+
+class VISUALUV_Preferences(bpy.types.AddonPreferences):
+    # all overlays share one process pool, so its size is set once for all objects
+    bl_idname = __package__
+
+    process_count : IntProperty(
+        default=1,
+        min=1,
+        soft_max=32,
+        description="Processes computing stretching, flipped and overlapping UVs of large meshes, 1 computes them inside Blender"
+    )
+    process_threshold : IntProperty(
+        default=500000,
+        min=0,
+        description="Fewest triangles for which the computation is split between processes"
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, 'process_count', text='Processes')
+        layout.prop(self, 'process_threshold', text='Process Threshold')
+
+
+def get_preferences(context):
+    return context.preferences.addons[__package__].preferences
 
 
 class VISUALUV_ObjectProperties(bpy.types.PropertyGroup):
@@ -9,6 +35,28 @@ class VISUALUV_ObjectProperties(bpy.types.PropertyGroup):
         update=lambda self, context: self.update_func(),
         description="Toggle the Auto-Update feature"
     )
+    refresh_budget : FloatProperty(
+        default=100.0,
+        min=1.0,
+        soft_max=1000.0,
+        description="Longest refresh in milliseconds before the overlay is refreshed less often, four times longer turns Auto-Update off"
+    )
+    memory_budget : IntProperty(
+        default=256,
+        min=16,
+        description="Memory in MB the triangle corners and metric temporaries of a chunk may take while they are streamed into the overlay buffers, merging the vertex records and the wireframe are not limited by it"
+    )
+    show_timings : BoolProperty(
+        description="Show how long every stage of the last refresh took"
+    )
+    timing_log : BoolProperty(
+        description="Append the timings of every refresh stage to a JSON lines file"
+    )
+    timing_log_path : StringProperty(
+        default="//visualuv_timings.jsonl",
+        subtype='FILE_PATH',
+        description="File the refresh timings are appended to"
+    )
     backface_culling : BoolProperty(
         description="Turn on to cull backfaces"
     )
@@ -24,7 +72,6 @@ class VISUALUV_ObjectProperties(bpy.types.PropertyGroup):
         description="Tweak the overlay's opacity"
     )
     recalculate : BoolProperty()
-    overlap_recalculate : BoolProperty()
     show_3D : BoolProperty(
         default=True,
         description="Display the overlay in the 3D Viewport"
@@ -131,11 +178,8 @@ class VISUALUV_ObjectProperties(bpy.types.PropertyGroup):
     )
 
     def update_func(self):
+        # an unchanged value is not written, every write tags the object for a geometry update
         value = getattr(self, 'operation') != 'NONE' or getattr(self, 'checker_texture')
-        setattr(self, 'recalculate', value)
-        setattr(self, 'enabled', value)
-
-
-class VISUALUV_WindowManagerProperties(bpy.types.PropertyGroup):
-    select_overlap : BoolProperty(default=False)
-    
\ No newline at end of file
+        for name in ('recalculate', 'enabled'):
+            if getattr(self, name) != value:
+                setattr(self, name, value)
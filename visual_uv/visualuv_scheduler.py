@@ -0,0 +1,219 @@
+import time
+import traceback
+import bpy
+
+from concurrent.futures import ThreadPoolExecutor
+from .visualuv_parallel import shutdown_pool
+
+# bursts of refresh requests within this many seconds are coalesced into one refresh
+REFRESH_DELAY = 0.1
+DEFERRED_REFRESH_DELAY = 1.0
+# refreshes due this many seconds after the first due one are run together with it
+REFRESH_BATCH_WINDOW = 0.05
+# a refresh taking longer than the budget times this factor turns Auto-Update off
+MANUAL_REFRESH_FACTOR = 4.0
+MILLISECONDS = 1000.0
+# seconds between checks for finished background refreshes
+JOB_POLL_INTERVAL = 0.02
+
+# overlay operator => time its refresh is due
+PENDING_REFRESHES = dict()
+# overlay operator => changes its refresh has to handle, None when everything has to be checked
+PENDING_CHANGES = dict()
+# object => (deferred, status) after its last refresh, kept out of the object properties,
+# since writing those tags the object for another update
+REFRESH_MODES = dict()
+# objects being refreshed, the depsgraph updates their refresh causes are no edits
+REFRESHING = set()
+
+# refreshes are computed on a single worker thread, one job per overlay at a time
+WORKER = None
+# overlay operator => (job, future) being computed
+RUNNING_JOBS = dict()
+# overlay operator => newest snapshot waiting for the running job, older ones are dropped
+WAITING_JOBS = dict()
+# overlay operator => buffers waiting for the next redraw to be uploaded
+FINISHED_JOBS = dict()
+
+
+def update_refresh_mode(obj, seconds):
+    # objects whose refresh does not fit the budget are refreshed less often, or only on demand
+    visualuv = obj.visualuv
+    milliseconds = seconds * MILLISECONDS
+    budget = visualuv.refresh_budget
+    if milliseconds <= budget:
+        REFRESH_MODES.pop(obj, None)
+    elif milliseconds <= budget * MANUAL_REFRESH_FACTOR:
+        REFRESH_MODES[obj] = (True, 'Refresh deferred, last refresh took %d ms (budget %d ms)' % (milliseconds, budget))
+    else:
+        if visualuv.auto_update:
+            # turning Auto-Update off asks for a refresh, which would only measure the same again
+            visualuv.auto_update = False
+            set_property(visualuv, 'recalculate', False)
+        REFRESH_MODES[obj] = (False, 'Auto-Update disabled, last refresh took %d ms (budget %d ms)' % (milliseconds, budget))
+
+
+def refresh_deferred(obj):
+    return REFRESH_MODES.get(obj, (False, ''))[0]
+
+
+def refresh_status(obj):
+    return REFRESH_MODES.get(obj, (False, ''))[1]
+
+
+def set_property(owner, name, value):
+    # every write of an add-on property tags its object for a geometry update, even an unchanged value
+    if getattr(owner, name) != value:
+        setattr(owner, name, value)
+
+
+def refresh(overlay, context, changes=None):
+    obj = overlay.obj
+    REFRESHING.add(obj)
+    try:
+        start = time.perf_counter()
+        job = overlay.recalculate_info(context, obj, changes)
+        job.snapshot_seconds = time.perf_counter() - start
+        submit_job(overlay, job)
+        # Object.update_from_editmode and property writes tag the object, the tags are evaluated
+        # while the object is marked, so the handler does not take them for an edit
+        context.evaluated_depsgraph_get()
+    finally:
+        REFRESHING.discard(obj)
+
+
+def is_own_update(obj):
+    return obj in REFRESHING
+
+
+def request_refresh(overlay, changes=None):
+    # every request postpones the refresh, so a burst of edits costs a single refresh
+    delay = DEFERRED_REFRESH_DELAY if refresh_deferred(overlay.obj) else REFRESH_DELAY
+    if overlay in PENDING_REFRESHES:
+        pending = PENDING_CHANGES[overlay]
+        changes = None if pending is None or changes is None else pending | changes
+    PENDING_REFRESHES[overlay] = time.perf_counter() + delay
+    PENDING_CHANGES[overlay] = changes
+    schedule_refreshes()
+
+
+def schedule_refreshes():
+    if bpy.app.timers.is_registered(run_pending_refreshes):
+        bpy.app.timers.unregister(run_pending_refreshes)
+    if PENDING_REFRESHES:
+        first_due = min(PENDING_REFRESHES.values())
+        bpy.app.timers.register(run_pending_refreshes, first_interval=max(first_due - time.perf_counter(), 0.0))
+
+
+def run_pending_refreshes():
+    # all tracked objects whose refresh is due are snapshotted in one pass
+    now = time.perf_counter() + REFRESH_BATCH_WINDOW
+    for overlay, due in list(PENDING_REFRESHES.items()):
+        if due > now:
+            continue
+        del PENDING_REFRESHES[overlay]
+        changes = PENDING_CHANGES.pop(overlay)
+        try:
+            if overlay.obj.visualuv.enabled:
+                refresh(overlay, bpy.context, changes)
+        except ReferenceError:
+            pass
+    if not PENDING_REFRESHES:
+        return None
+    return max(min(PENDING_REFRESHES.values()) - time.perf_counter(), 0.0)
+
+
+def submit_job(overlay, job):
+    # a newer snapshot makes the running job stale, it stops at its next checkpoint
+    running = RUNNING_JOBS.get(overlay)
+    if running is None:
+        start_job(overlay, job)
+    else:
+        running[0].cancelled.set()
+        WAITING_JOBS[overlay] = job
+    if not bpy.app.timers.is_registered(poll_jobs):
+        bpy.app.timers.register(poll_jobs, first_interval=JOB_POLL_INTERVAL)
+
+
+def start_job(overlay, job):
+    global WORKER
+    if WORKER is None:
+        WORKER = ThreadPoolExecutor(max_workers=1, thread_name_prefix='visualuv')
+    RUNNING_JOBS[overlay] = (job, WORKER.submit(overlay.data.compute, job))
+
+
+def finish_job(overlay, job, future):
+    try:
+        buffers = future.result()
+    except Exception:
+        traceback.print_exc()
+        return
+    if buffers is not None:
+        previous = FINISHED_JOBS.get(overlay)
+        FINISHED_JOBS[overlay] = buffers if previous is None else buffers.merge(previous)
+        overlay.version += 1
+    if not job.cancelled.is_set():
+        overlay.add_profile(job.profile)
+        try:
+            update_refresh_mode(overlay.obj, job.snapshot_seconds + job.compute_seconds)
+        except ReferenceError:
+            pass
+
+
+def take_finished_job(overlay):
+    return FINISHED_JOBS.pop(overlay, None)
+
+
+def poll_jobs():
+    for overlay, (job, future) in list(RUNNING_JOBS.items()):
+        if not future.done():
+            continue
+        del RUNNING_JOBS[overlay]
+        finish_job(overlay, job, future)
+        waiting = WAITING_JOBS.pop(overlay, None)
+        if waiting is not None:
+            start_job(overlay, waiting)
+        # the previous buffers are drawn until the redraw picks up the finished ones
+        try:
+            overlay.tag_redraw(bpy.context)
+        except ReferenceError:
+            pass
+    if not RUNNING_JOBS:
+        return None
+    return JOB_POLL_INTERVAL
+
+
+def discard_jobs(overlay):
+    # the job still running finishes in the background, its result is dropped
+    running = RUNNING_JOBS.pop(overlay, None)
+    if running is not None:
+        running[0].cancelled.set()
+    WAITING_JOBS.pop(overlay, None)
+    FINISHED_JOBS.pop(overlay, None)
+    PENDING_REFRESHES.pop(overlay, None)
+    PENDING_CHANGES.pop(overlay, None)
+
+
+def cancel_jobs():
+    global WORKER
+    for job, future in RUNNING_JOBS.values():
+        job.cancelled.set()
+    RUNNING_JOBS.clear()
+    WAITING_JOBS.clear()
+    FINISHED_JOBS.clear()
+    if bpy.app.timers.is_registered(poll_jobs):
+        bpy.app.timers.unregister(poll_jobs)
+    if WORKER is not None:
+        WORKER.shutdown(wait=True, cancel_futures=True)
+        WORKER = None
+    shutdown_pool()
+
+
+def cancel_refreshes():
+    PENDING_REFRESHES.clear()
+    PENDING_CHANGES.clear()
+    REFRESHING.clear()
+    REFRESH_MODES.clear()
+    if bpy.app.timers.is_registered(run_pending_refreshes):
+        bpy.app.timers.unregister(run_pending_refreshes)
+    cancel_jobs()
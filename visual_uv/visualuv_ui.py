@@ -1,5 +1,12 @@
 import bpy
 
+from .visualuv_ops import OVERLAYS
+from .visualuv_profile import MILLISECONDS
+from .visualuv_scheduler import refresh_status
+from .visualuv_props import get_preferences
+
+BYTES_PER_MB = 1024 * 1024
+
 class VisualUVPanel():
     def draw_ui(self, layout, context, is_uv):
         if not context.selected_objects:
@@ -53,18 +60,17 @@ class VisualUVPanel():
         layout.separator(factor=0.1)
 
         # UV overlapping button
-        if obj.mode == 'EDIT' and not bpy.context.tool_settings.use_uv_select_sync:
-            toggle_text = 'Enable UV Overlapping' if visualuv.operation != 'UV_OVERLAP' else 'Disable UV Overlapping'
-            toggle_icon = 'HIDE_OFF' if visualuv.operation == 'UV_OVERLAP' else 'HIDE_ON'
+        toggle_text = 'Enable UV Overlapping' if visualuv.operation != 'UV_OVERLAP' else 'Disable UV Overlapping'
+        toggle_icon = 'HIDE_OFF' if visualuv.operation == 'UV_OVERLAP' else 'HIDE_ON'
 
-            enable_box = layout.box()
-            enable_container = enable_box.row()
-            enable_container.operator('visualuv.toggle_overlap', text=toggle_text, icon=toggle_icon)
-            enable_container.scale_y = 1.5
-            if visualuv.operation == 'UV_OVERLAP':
-                operation_box = enable_box
+        enable_box = layout.box()
+        enable_container = enable_box.row()
+        enable_container.operator('visualuv.toggle_overlap', text=toggle_text, icon=toggle_icon)
+        enable_container.scale_y = 1.5
+        if visualuv.operation == 'UV_OVERLAP':
+            operation_box = enable_box
 
-            layout.separator(factor=0.1)
+        layout.separator(factor=0.1)
 
         # UV island coloring button
         toggle_text = 'Enable Island Coloring' if visualuv.operation != 'UV_ISLANDS' else 'Disable Island Coloring'
@@ -105,6 +111,29 @@ class VisualUVPanel():
         refresh_box = layout.box()
         refresh_box.operator('visualuv.update', text='Refresh', icon='FILE_REFRESH')
         refresh_box.prop(visualuv, 'auto_update', text="Auto-Update")
+        refresh_box.prop(visualuv, 'refresh_budget', text='Refresh Budget (ms)')
+        # the processes are shared by all objects
+        preferences = get_preferences(context)
+        refresh_box.prop(preferences, 'process_count', text='Processes (all objects)')
+        if preferences.process_count > 1:
+            refresh_box.prop(preferences, 'process_threshold', text='Process Threshold')
+        refresh_box.prop(visualuv, 'memory_budget', text='Metric Memory Budget (MB)')
+        status = refresh_status(obj)
+        if status:
+            refresh_box.label(text=status, icon='INFO')
+        # buffers, mesh data and timings belong to the overlay shared by every object using the mesh
+        shared = getattr(OVERLAYS.get(obj), 'shared', None)
+        if shared is not None and len(shared.users) > 1:
+            refresh_box.label(text='Shared by %d objects' % len(shared.users), icon='LINKED')
+        buffer_bytes = getattr(shared, 'buffer_bytes', None)
+        if buffer_bytes:
+            used, saved = buffer_bytes
+            refresh_box.label(text='GPU Buffers: %.2f MB (%.2f MB saved)' % (used / BYTES_PER_MB, saved / BYTES_PER_MB), icon='MEMORY')
+        source = getattr(shared, 'source', None)
+        if source is not None and source.arrays is not None:
+            text = 'Mesh Data: %.2f MB (%d extracted, %d reused)' % (source.memory_bytes() / BYTES_PER_MB, source.extractions, source.reuses)
+            refresh_box.label(text=text, icon='MESH_DATA')
+        self.draw_timings(refresh_box, obj, shared)
         refresh_box.scale_y = 1.5
         layout.separator(factor=0.1)
         
@@ -150,6 +179,34 @@ class VisualUVPanel():
             explosion_box.separator(factor=0.1)
         layout.separator(factor=0.1)
 
+    def draw_timings(self, layout, obj, shared):
+        visualuv = obj.visualuv
+        icon = 'TRIA_DOWN' if visualuv.show_timings else 'TRIA_RIGHT'
+        layout.prop(visualuv, 'show_timings', text='Refresh Timings', icon=icon, emboss=False)
+        if not visualuv.show_timings:
+            return
+        timings_box = layout.box()
+        profiles = getattr(shared, 'profiles', None)
+        if profiles:
+            profile = profiles[-1]
+            column = timings_box.column(align=True)
+            for record in profile.stages:
+                text = '%s: %.1f ms, %d tris' % (record.name, record.seconds * MILLISECONDS, record.triangles)
+                if record.buffer_bytes:
+                    text += ', %.2f MB' % (record.buffer_bytes / BYTES_PER_MB)
+                if record.peak_bytes:
+                    text += ', peak %.2f MB' % (record.peak_bytes / BYTES_PER_MB)
+                column.label(text=text)
+            average = sum(profile.seconds for profile in profiles) / len(profiles)
+            timings_box.label(text='Last %.1f ms, average of %d refreshes %.1f ms' % (profile.seconds * MILLISECONDS, len(profiles), average * MILLISECONDS))
+            if profile.peak_bytes:
+                timings_box.label(text='Estimated peak memory %.2f MB' % (profile.peak_bytes / BYTES_PER_MB))
+        else:
+            timings_box.label(text='No refresh finished yet')
+        timings_box.prop(visualuv, 'timing_log', text='Log Timings')
+        if visualuv.timing_log:
+            timings_box.prop(visualuv, 'timing_log_path', text='')
+
 class VISUALUV_PT_3d_view(bpy.types.Panel, VisualUVPanel):
     bl_label = "VisualUV Overlays"
     bl_idname = "VISUALUV_PT_uv_tool_menu3d"